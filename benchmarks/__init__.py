@@ -0,0 +1,10 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Frame pipeline benchmarks for the Space Invaders game.
+
+Run with ``python -m benchmarks`` from the repository root.
+"""
+
+__all__ = ["collide", "run", "scenarios"]
@@ -0,0 +1,11 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Entry point for ``python -m benchmarks``."""
+
+import sys
+
+from .run import main
+
+sys.exit(main())
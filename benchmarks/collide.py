@@ -0,0 +1,181 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Micro-benchmark: pygame.sprite.groupcollide against videogame.aabb.
+
+Run with ``python -m benchmarks.collide``. Each size is a total entity
+count, split evenly between bullets and enemies scattered over the
+playfield; both methods must find the same overlapping pairs.
+
+``--verify`` skips the timings and instead checks, over many random
+layouts, that every collision path the game uses finds exactly the pairs
+groupcollide does: collide_rects' broadcast and sort-and-sweep paths and
+SpatialHash's cell path, whose per-cell dedup is the subtle part.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from videogame.aabb import collide_rects
+from videogame.spatial import SpatialHash
+from videogame.setup import (
+    bullet_height, bullet_width, enemy_height, enemy_width, window_height, window_width
+)
+
+SIZES = [10, 100, 1000, 10000]
+VERIFY_LAYOUTS = 300
+
+
+def _rects(rng, count, width, height):
+    rects = np.empty((count, 4), dtype=np.int64)
+    rects[:, 0] = rng.integers(0, window_width - width, count)
+    rects[:, 1] = rng.integers(0, window_height - height, count)
+    rects[:, 2] = width
+    rects[:, 3] = height
+    return rects
+
+
+def _group(rects):
+    group = pygame.sprite.Group()
+    for index, rect in enumerate(rects.tolist()):
+        sprite = pygame.sprite.Sprite()
+        sprite.rect = pygame.Rect(rect)
+        sprite.index = index
+        group.add(sprite)
+    return group
+
+
+def _time(function, min_seconds):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        result = function()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return result, elapsed / runs * 1000.0
+
+
+def _random_rects(rng, count, max_size, snap):
+    # Rects of mixed sizes, some hanging off the top or left edge (bullets
+    # leave the screen that way). Snapping positions and sizes to a coarse
+    # grid makes exactly touching edges common.
+    rects = np.empty((count, 4), dtype=np.int64)
+    rects[:, 0] = rng.integers(-max_size, window_width, count)
+    rects[:, 1] = rng.integers(-max_size, window_height, count)
+    rects[:, 2:] = rng.integers(1, max_size + 1, (count, 2))
+    rects[:, :2] -= rects[:, :2] % snap
+    rects[:, 2:] = np.maximum(rects[:, 2:] - rects[:, 2:] % snap, snap)
+    return rects
+
+
+def _groupcollide_pairs(a, b):
+    hits = pygame.sprite.groupcollide(_group(a), _group(b), False, False)
+    return sorted((sprite.index, other.index) for sprite, found in hits.items() for other in found)
+
+
+def verify(layouts=VERIFY_LAYOUTS, seed=0):
+    """Check every collision path against groupcollide; return the pairs compared.
+
+    Raises AssertionError naming the path and layout on the first mismatch.
+    """
+    compared = 0
+    for layout in range(layouts):
+        rng = np.random.default_rng([seed, layout])
+        # Every tenth layout is big enough for collide_rects to switch to
+        # sort and sweep on its own.
+        most = 600 if layout % 10 == 0 else 120
+        a = _random_rects(rng, int(rng.integers(0, most)), int(rng.choice([4, 16, 64, 200])),
+                          int(rng.choice([1, 8])))
+        b = _random_rects(rng, int(rng.integers(0, most)), int(rng.choice([4, 16, 64, 200])),
+                          int(rng.choice([1, 8])))
+        expected = _groupcollide_pairs(a, b)
+
+        # collide_rects must also return its pairs sorted by i, then j.
+        paths = {
+            "collide_rects": collide_rects(a, b),
+            "collide_rects broadcast": collide_rects(a, b, broadcast_pairs=len(a) * len(b)),
+            "collide_rects sweep": collide_rects(a, b, broadcast_pairs=0),
+        }
+        for path, (i, j) in paths.items():
+            if list(zip(i.tolist(), j.tolist())) != expected:
+                raise AssertionError(f"{path} disagrees with groupcollide in layout {layout}")
+
+        # The grid reports items by id, and each pair must come back once.
+        grid = SpatialHash(cell_size=int(rng.choice([8, 32, 64])), brute_force_pairs=0)
+        ids = rng.permutation(len(b))
+        grid.build(b, ids)
+        target_index, item_ids = grid.query(a)
+        pairs = sorted(zip(target_index.tolist(), np.argsort(ids)[item_ids].tolist()))
+        if pairs != expected:
+            raise AssertionError(f"SpatialHash disagrees with groupcollide in layout {layout}")
+        compared += len(expected)
+    return compared
+
+
+def run_size(size, min_seconds=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    bullets = _rects(rng, size // 2, bullet_width, bullet_height)
+    enemies = _rects(rng, size - size // 2, enemy_width, enemy_height)
+    bullet_group = _group(bullets)
+    enemy_group = _group(enemies)
+
+    hits, groupcollide_ms = _time(
+        lambda: pygame.sprite.groupcollide(bullet_group, enemy_group, False, False), min_seconds
+    )
+    expected = sorted((b.index, e.index) for b, found in hits.items() for e in found)
+
+    (i, j), kernel_ms = _time(lambda: collide_rects(bullets, enemies), min_seconds)
+    if sorted(zip(i.tolist(), j.tolist())) != expected:
+        raise AssertionError(f"collide_rects disagrees with groupcollide at {size} entities")
+
+    return {
+        "entities": size,
+        "pairs": len(expected),
+        "groupcollide_ms": groupcollide_ms,
+        "collide_rects_ms": kernel_ms,
+        "speedup": groupcollide_ms / kernel_ms if kernel_ms else float("inf"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare groupcollide with collide_rects.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="total entity counts")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="check every collision path against groupcollide on random layouts instead",
+    )
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        pairs = verify()
+        print(f"{VERIFY_LAYOUTS} layouts, {pairs} overlapping pairs: all paths match groupcollide")
+        return 0
+
+    results = []
+    print(f"{'entities':>8} {'pairs':>8} {'groupcollide':>14} {'collide_rects':>14} {'speedup':>8}")
+    for size in args.sizes:
+        result = run_size(size)
+        results.append(result)
+        print(
+            f"{result['entities']:>8} {result['pairs']:>8} "
+            f"{result['groupcollide_ms']:>11.3f} ms {result['collide_rects_ms']:>11.3f} ms "
+            f"{result['speedup']:>7.1f}x"
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Time each phase of a frame for every scenario and compare to a baseline."""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import pygame
+
+from videogame.game import Game
+
+from .scenarios import SCENARIOS
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+PHASES = [
+    ("update", lambda game: game.update()),
+    ("broad_phase", lambda game: game.build_collision_grid()),
+    ("collide_bullets_enemies", lambda game: game.collide_bullets_enemies()),
+    ("collide_player_enemy_bullets", lambda game: game.collide_player_enemy_bullets()),
+    ("collide_bullets_obstacles", lambda game: game.collide_bullets_obstacles()),
+    ("collide_enemy_bullets_obstacles", lambda game: game.collide_enemy_bullets_obstacles()),
+    ("remove_spent_bullets", lambda game: game.remove_spent_bullets()),
+    ("draw", lambda game: game.draw_frame()),
+    ("present", lambda game: game.scenes.present(game.update_rects)),
+]
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_scenario(scenario, frames, warmup, seed=0):
+    """Run one scenario and return per-phase timings in milliseconds."""
+    # With sound, so the timings include the effects' channel pool.
+    game = Game(headless=True, seed=seed, sound=True)
+    game.setup()
+    scenario.populate(game)
+
+    samples = {name: [] for name, _ in PHASES}
+    for frame in range(warmup + frames):
+        if scenario.per_frame is not None:
+            scenario.per_frame(game)
+        for name, phase in PHASES:
+            start = time.perf_counter()
+            phase(game)
+            elapsed = time.perf_counter() - start
+            if frame >= warmup:
+                samples[name].append(elapsed * 1000.0)
+    pygame.quit()
+
+    result = {}
+    for name, times in samples.items():
+        result[name] = {
+            "mean_ms": sum(times) / len(times),
+            "p95_ms": _percentile(times, 0.95),
+        }
+    result["frame_ms"] = {
+        "mean_ms": sum(phase["mean_ms"] for phase in result.values()),
+    }
+    return result
+
+
+def compare(results, baseline, tolerance, min_delta_ms=0.05):
+    """Return a list of (scenario, phase, baseline_ms, current_ms) regressions.
+
+    A phase regresses when it is slower than the baseline by more than
+    tolerance (relative) and min_delta_ms (absolute); the absolute floor keeps
+    timer noise on near-empty phases from being reported.
+    """
+    regressions = []
+    for name, phases in results["scenarios"].items():
+        base_phases = baseline.get("scenarios", {}).get(name, {})
+        for phase, timing in phases.items():
+            base = base_phases.get(phase)
+            if base is None:
+                continue
+            slower = timing["mean_ms"] - base["mean_ms"]
+            if slower > base["mean_ms"] * tolerance and slower > min_delta_ms:
+                regressions.append((name, phase, base["mean_ms"], timing["mean_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the frame pipeline.")
+    parser.add_argument("--frames", type=int, default=300, help="timed frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="untimed frames per scenario")
+    parser.add_argument("--scenario", action="append", help="run only the named scenario(s)")
+    parser.add_argument("--output", default="bench_results.json", help="where to write results")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)"
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=0.05, help="ignore slowdowns smaller than this (ms)"
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="overwrite the baseline with these results"
+    )
+    args = parser.parse_args(argv)
+
+    selected = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    results = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "frames": args.frames,
+        "scenarios": {},
+    }
+    for scenario in selected:
+        timings = run_scenario(scenario, args.frames, args.warmup)
+        results["scenarios"][scenario.name] = timings
+        print(f"{scenario.name}:")
+        for phase, timing in timings.items():
+            print(f"  {phase:<32} {timing['mean_ms']:8.3f} ms")
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    for name, phase, base, current in regressions:
+        print(f"REGRESSION {name}/{phase}: {base:.3f} ms -> {current:.3f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Fixed workloads the benchmark runner drives a headless Game through.
+
+A scenario is a name, a populate function that is called once after the
+world is built, and an optional per-frame hook that runs outside the timed
+phases (for example to keep the bullet count topped up).
+"""
+
+from collections import namedtuple
+
+from videogame.bullets import ENEMY, PLAYER
+from videogame.setup import bullet_speed, window_height, window_width
+
+Scenario = namedtuple("Scenario", ["name", "populate", "per_frame"])
+
+
+def _stock_wave(game):
+    # Game.setup() already spawned the 4x4 wave.
+    pass
+
+
+def _thousand_enemies(game, count=1000):
+    for enemy in game.enemies:
+        enemy.kill()
+    # A dense 40-column block, overlapping, narrower than the playfield so
+    # the formation still marches from edge to edge.
+    columns = 40
+    for i in range(count):
+        x = 50 + (i % columns) * 15
+        y = 50 + (i // columns) * 10
+        enemy = game.enemy_pool.acquire(x, y)
+        game.enemies.add(enemy)
+
+
+def _fill_bullets(game, count=5000):
+    missing = count - len(game.bullets)
+    for i in range(missing):
+        x = (i * 13) % window_width
+        y = (i * 7) % window_height
+        if i % 2:
+            game.bullets.spawn(x, y, -bullet_speed, PLAYER)
+        else:
+            game.bullets.spawn(x, y, bullet_speed, ENEMY)
+
+
+def _hold_space(game):
+    game.player.shoot()
+
+
+SCENARIOS = [
+    Scenario("stock_wave", _stock_wave, None),
+    Scenario("enemies_1000", _thousand_enemies, None),
+    Scenario("bullets_5000", _fill_bullets, _fill_bullets),
+    Scenario("space_held", _stock_wave, _hold_space),
+]
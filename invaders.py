@@ -7,11 +7,194 @@
 Imports the the game demo and executes the main function.
 """
 
+import argparse
+import atexit
+import cProfile
+import logging
+import os
+import pstats
+import subprocess
 import sys
-from videogame import game
+import time
+
+# Taken before pygame, NumPy and the game are imported (below, on demand),
+# so the logged time to first frame covers the whole cold start.
+launched = time.perf_counter()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Space Invaders")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without a display or sound card, uncapped, and report FPS",
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=600,
+        help="number of frames to simulate in headless mode (default: 600)",
+    )
+    parser.add_argument("--seed", type=int, help="seed for the game's random number generator")
+    parser.add_argument("--record", metavar="PATH", help="log every tick's input to PATH")
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="replay an input log headless at full speed and verify its state checksums",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report import and initialization times up to the first frame, then exit",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="profile each scene separately and write its .pstats (and a merged all.pstats) to DIR",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="write every frame's phases to PATH as Chrome trace events (chrome://tracing, Perfetto)",
+    )
+    return parser.parse_args(argv)
+
+
+def import_times(module="videogame.game", limit=10):
+    """Import module in a fresh interpreter and total the import time per top-level package.
+
+    Returns up to limit (package, seconds) pairs, slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [(package, us / 1e6) for package, us in ranked[:limit]]
+
+
+def profile_startup(args):
+    def report(name, seconds):
+        print(f"  {name:28s}{seconds * 1000:9.1f} ms")
+
+    print("Imports (fresh interpreter, self time by package):")
+    for package, seconds in import_times():
+        report(package, seconds)
+
+    # The import timing above ran in a separate interpreter; start the clock
+    # for this one's cold start now.
+    started = time.perf_counter()
+    from videogame.game import Game
+
+    game = Game(headless=args.headless, seed=args.seed, started=started)
+    game.setup()
+    game.show_title()
+    game.assets.wait()
+    print("Initialization:")
+    for name, seconds in game.init_timings:
+        report(name, seconds)
+    print("Assets (background thread):")
+    for name, seconds in game.assets.timings():
+        report(name, seconds)
+    report("time to first frame", game.assets.first_frame_seconds)
+    game.quit()
+
+
+def profile_scenes(game, directory, limit=15):
+    """Give every scene its own cProfile.Profile, running while it is on top.
+
+    Each frame (events, update, draw and present) counts against the scene
+    on top of the stack when it starts, so the idle title screen stays
+    out of the gameplay profile. At exit <Scene>.pstats is written per
+    scene to directory, along with a merged all.pstats, and the top limit
+    functions of each scene by cumulative time are printed.
+    """
+    profiles = {}
+    frames = {}
+    setup = game.setup
+
+    def profiled_setup():
+        # The scene manager is created by setup(), in run_game() as well
+        # as run_headless().
+        setup()
+        scenes = game.scenes
+        step = scenes.step
+
+        def profiled_step():
+            name = type(scenes.top).__name__
+            profile = profiles.get(name)
+            if profile is None:
+                profile = profiles[name] = cProfile.Profile()
+                frames[name] = 0
+            frames[name] += 1
+            profile.runcall(step)
+
+        scenes.step = profiled_step
+
+    def report():
+        if not profiles:
+            return
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, profile in sorted(profiles.items()):
+            paths.append(os.path.join(directory, f"{name}.pstats"))
+            profile.dump_stats(paths[-1])
+        pstats.Stats(*paths).dump_stats(os.path.join(directory, "all.pstats"))
+
+        for name, profile in sorted(profiles.items()):
+            stats = pstats.Stats(profile)
+            print(f"{name}: {frames[name]} frames, {stats.total_tt * 1000:.1f} ms")
+            ranked = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            for function, (_, calls, _, cumulative, _) in ranked[:limit]:
+                print(f"  {cumulative * 1000:10.1f} ms {calls:8d}  {pstats.func_std_string(function)}")
+        print(f"Profiles written to {directory}")
+
+    game.setup = profiled_setup
+    atexit.register(report)
+
 
 if __name__ == "__main__":
     # TODO: Prepare and run the game
-    game = game.Game()
-    game.run_game()
+    args = parse_args(sys.argv[1:])
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.profile_startup:
+        profile_startup(args)
+        sys.exit(0)
+
+    # Imported only now so --help and argument errors don't load pygame.
+    from videogame.game import Game
+
+    game = Game(headless=args.headless or args.replay is not None, seed=args.seed, started=launched)
+    if args.profile:
+        profile_scenes(game, args.profile)
+    if args.trace:
+        from videogame import tracing
+
+        tracing.start(args.trace)
+        atexit.register(tracing.stop)
+    if args.record:
+        game.record_input(args.record)
+    if args.replay:
+        game.replay_input(args.replay)
+        stats = game.run_headless()
+        print(f"{stats['frames']} frames in {stats['seconds']:.3f}s ({stats['fps']:.1f} fps)")
+        if stats["replay_divergence"] is not None:
+            print(f"Replay diverged from the recording at tick {stats['replay_divergence']}")
+            sys.exit(1)
+        print(f"Replay matched the recording (final checksum {stats['checksum']:08x})")
+    elif args.headless:
+        stats = game.run_headless(args.frames)
+        print(f"{stats['frames']} frames in {stats['seconds']:.3f}s ({stats['fps']:.1f} fps)")
+    else:
+        game.run_game()
     sys.exit(0)
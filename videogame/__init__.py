@@ -4,4 +4,7 @@
 
 """Init file for the PyGame demo."""
 
-__all__ = ["game", "rgbcolors", "scene"]
\ No newline at end of file
+__all__ = [
+    "aabb", "assets", "bullets", "formation", "game", "images", "leaderboard", "pool", "profiler",
+    "replay", "rgbcolors", "scene", "scores", "sfx", "spatial", "text", "tracing",
+]
\ No newline at end of file
@@ -0,0 +1,74 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Batch axis-aligned rect collision over NumPy (x, y, w, h) arrays."""
+
+import numpy as np
+
+from .setup import aabb_broadcast_pairs
+
+
+def overlap(a, b):
+    """Strict AABB overlap of (..., 4) rect arrays, broadcasting like NumPy.
+
+    Matches pygame.Rect.colliderect: touching edges do not overlap.
+    """
+    return (
+        (a[..., 0] < b[..., 0] + b[..., 2])
+        & (a[..., 0] + a[..., 2] > b[..., 0])
+        & (a[..., 1] < b[..., 1] + b[..., 3])
+        & (a[..., 1] + a[..., 3] > b[..., 1])
+    )
+
+
+def collide_rects(a, b, broadcast_pairs=aabb_broadcast_pairs):
+    """Return (i, j) index arrays of every pair where a[i] overlaps b[j].
+
+    a is N x 4 and b is M x 4. Pairs come back sorted by i, then j. Up to
+    broadcast_pairs pairs are tested with one N x M broadcast; above that
+    b is sorted on x and each a rect is only tested against the run of b
+    rects whose left edge could reach it (sort and sweep).
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(a) or not len(b):
+        return empty, empty
+    if len(a) * len(b) <= broadcast_pairs:
+        i, j = np.nonzero(overlap(a[:, np.newaxis, :], b[np.newaxis, :, :]))
+        return i, j
+    return _sweep(a, b)
+
+
+def _sweep(a, b):
+    empty = np.zeros(0, dtype=np.int64)
+    order = np.argsort(b[:, 0], kind="stable")
+    b_left = b[order, 0]
+    widest = int(b[:, 2].max())
+
+    # b[k] can only reach a[i] if a.left - widest < b.left < a.right.
+    lo = np.searchsorted(b_left, a[:, 0] - widest, side="right")
+    hi = np.searchsorted(b_left, a[:, 0] + a[:, 2], side="left")
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    if not total:
+        return empty, empty
+    i = np.repeat(np.arange(len(a)), counts)
+    position = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    j = order[position]
+
+    # b.left < a.right holds for the whole run; test the other three edges
+    # on contiguous columns rather than on gathered N x 4 rows.
+    b_right = b[:, 0] + b[:, 2]
+    b_top = np.ascontiguousarray(b[:, 1])
+    b_bottom = b[:, 1] + b[:, 3]
+    a_top = np.ascontiguousarray(a[:, 1])
+    a_bottom = a[:, 1] + a[:, 3]
+    hit = (
+        (np.ascontiguousarray(a[:, 0])[i] < b_right[j])
+        & (a_top[i] < b_bottom[j])
+        & (a_bottom[i] > b_top[j])
+    )
+    i = i[hit]
+    j = j[hit]
+    ordered = np.lexsort((j, i))
+    return i[ordered], j[ordered]
@@ -0,0 +1,136 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Data files found relative to the package and loaded off the main thread."""
+
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def data_path(name):
+    """Return the path of a file shipped in videogame/data, wherever we run from."""
+    return os.path.join(data_dir, name)
+
+
+def read_bytes(path):
+    with open(path, "rb") as data_file:
+        return data_file.read()
+
+
+class Asset:
+    """A handle to one asset that may still be loading.
+
+    get() returns the loaded value, waiting for the loader thread only if
+    it has not got to this asset yet, and re-raises whatever the loader
+    raised.
+    """
+
+    def __init__(self, name, loader, on_ready=None):
+        self.name = name
+        self.on_ready = on_ready
+        self._loader = loader
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+        self.seconds = None
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def get(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def load(self):
+        start = time.perf_counter()
+        try:
+            self._value = self._loader()
+        except Exception as error:  # handed to whoever calls get()
+            self._error = error
+        self.seconds = time.perf_counter() - start
+        self._done.set()
+
+
+class AssetManager:
+    """Loads queued assets in order on one background thread.
+
+    Loaders run on the loader thread, so they must not touch state that is
+    only safe on the main thread (drawing to the window, music playback); anything
+    like that goes in an on_ready callback, which poll() calls with the
+    Asset on the calling thread once it has loaded.
+
+    Load and first-frame times are measured from started, a
+    time.perf_counter() value; pass the one taken when the program
+    launched so they cover imports too. It defaults to now.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.load_seconds = None
+        self.first_frame_seconds = None
+        self._assets = {}
+        self._waiting = []
+        self._thread = None
+
+    def add(self, name, loader, on_ready=None):
+        asset = Asset(name, loader, on_ready)
+        self._assets[name] = asset
+        if on_ready is not None:
+            self._waiting.append(asset)
+        return asset
+
+    def __getitem__(self, name):
+        return self._assets[name]
+
+    def get(self, name):
+        return self._assets[name].get()
+
+    def timings(self):
+        """Return (name, seconds) for every asset that has finished loading."""
+        return [(asset.name, asset.seconds) for asset in self._assets.values() if asset.ready]
+
+    @property
+    def pending(self):
+        """True while anything is still loading or waiting for poll()."""
+        return bool(self._waiting) or self.load_seconds is None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._load_all, name="asset-loader", daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        """Block until every asset has loaded (or failed to)."""
+        if self._thread is not None:
+            self._thread.join()
+
+    def poll(self):
+        """Run the on_ready callbacks of assets that have finished loading."""
+        if not self._waiting:
+            return
+        ready = [asset for asset in self._waiting if asset.ready]
+        for asset in ready:
+            self._waiting.remove(asset)
+            asset.on_ready(asset)
+
+    def first_frame(self):
+        """Note that the first frame is on screen and log how long it took."""
+        if self.first_frame_seconds is None:
+            self.first_frame_seconds = time.perf_counter() - self.started
+            log.info("time to first frame: %.1f ms", self.first_frame_seconds * 1000)
+
+    def _load_all(self):
+        for asset in list(self._assets.values()):
+            asset.load()
+            log.debug("loaded %s in %.1f ms", asset.name, asset.seconds * 1000)
+        self.load_seconds = time.perf_counter() - self.started
+        log.info("assets loaded: %.1f ms", self.load_seconds * 1000)
@@ -0,0 +1,112 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Every live bullet, player and enemy alike, stored as NumPy arrays."""
+
+import numpy as np
+
+from .setup import bullet_height, bullet_width, window_height
+
+PLAYER = 0
+ENEMY = 1
+
+
+class BulletStore:
+    """Struct-of-arrays bullet storage.
+
+    Slots [0, count) are live and kept in the order they were fired, which
+    is the order pygame's groupcollide used to visit them in. x and y are
+    the top-left corner of each bullet, vy its vertical speed in pixels per
+    frame and owner either PLAYER or ENEMY.
+    """
+
+    def __init__(self, capacity=64):
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.vy = np.zeros(capacity, dtype=np.int64)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.count = 0
+        self.growth = 0
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, centerx, y, vy, owner):
+        if self.count == len(self.x):
+            self._grow()
+        index = self.count
+        self.x[index] = centerx - bullet_width // 2
+        self.y[index] = y
+        self.vy[index] = vy
+        self.owner[index] = owner
+        self.count += 1
+
+    def step(self):
+        """Move every bullet and drop the ones that left the screen."""
+        if not self.count:
+            return
+        n = self.count
+        ys = self.y[:n]
+        ys += self.vy[:n]
+        self.remove((ys + bullet_height < 0) | (ys > window_height))
+
+    def remove(self, mask):
+        """Drop the live bullets selected by a boolean mask of length count."""
+        if not mask.any():
+            return
+        n = self.count
+        keep = ~mask
+        kept = int(np.count_nonzero(keep))
+        for array in (self.x, self.y, self.vy, self.owner):
+            array[:kept] = array[:n][keep]
+        self.count = kept
+
+    def clear(self):
+        self.count = 0
+
+    def owned_by(self, owner):
+        """Return a boolean mask of the live bullets fired by owner."""
+        return self.owner[:self.count] == owner
+
+    def rects(self):
+        """Return the live bullets as an N x 4 (x, y, w, h) array."""
+        n = self.count
+        rects = np.empty((n, 4), dtype=np.int64)
+        rects[:, 0] = self.x[:n]
+        rects[:, 1] = self.y[:n]
+        rects[:, 2] = bullet_width
+        rects[:, 3] = bullet_height
+        return rects
+
+    def draw(self, surface, image, rects=False, alpha=1.0):
+        """Blit every bullet; return the drawn rects if rects is true.
+
+        alpha < 1 draws each bullet that fraction of a step past where it
+        was on the previous tick.
+        """
+        n = self.count
+        if not n:
+            return []
+        ys = self.y[:n]
+        if alpha < 1.0:
+            ys = ys - np.rint(self.vy[:n] * (1.0 - alpha)).astype(ys.dtype)
+        positions = zip(self.x[:n].tolist(), ys.tolist())
+        drawn = surface.blits([(image, position) for position in positions], doreturn=rects)
+        return drawn if rects else []
+
+    def stats(self):
+        return {
+            "live": self.count,
+            "capacity": len(self.x),
+            "growth": self.growth,
+        }
+
+    def _grow(self):
+        self.growth += 1
+        capacity = len(self.x) * 2
+        for name in ("x", "y", "vy", "owner"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
@@ -0,0 +1,178 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Enemy formation kept as NumPy arrays and advanced in one vectorized step."""
+
+from bisect import insort
+
+import numpy as np
+import pygame
+
+from .setup import enemy_fire_chance, enemy_height, enemy_speed, enemy_width, window_width
+
+
+class Formation:
+    """Positions and alive flags for every enemy in the wave.
+
+    Slot i holds the top-left corner of one enemy; the Enemy sprite that
+    owns the slot only reads its rect from here. The whole formation moves
+    sideways together and, when its bounding box touches a screen edge,
+    drops one row and reverses.
+
+    Enemies fire one at a time on a schedule kept for the whole formation.
+    The gap until the next shot is drawn from a geometric distribution with
+    the same rate as every living enemy rolling enemy_fire_chance each
+    tick. The shooter is the bottom-most living enemy of a random column, so
+    an enemy never fires through the ones below it. Columns are the x
+    positions enemies were spawned at; each keeps its slots sorted by y
+    and drops them as they die.
+    """
+
+    def __init__(self, capacity=16, rng=None):
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.prev_x = np.zeros(capacity, dtype=np.int64)
+        self.prev_y = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.sprites = [None] * capacity
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+        self.living = 0
+        self.direction = 1
+        self._column_of = [None] * capacity
+        self._column_ids = {}
+        self._columns = []
+        self._active = []
+        self._active_position = {}
+        self._fire_countdown = None
+
+    def add(self, x, y, sprite):
+        """Claim a slot for sprite at (x, y) and return its index."""
+        if self.living == 0:
+            # A fresh wave starts from the first slot, moving right.
+            self.alive[:self.count] = False
+            self.sprites[:self.count] = [None] * self.count
+            self.count = 0
+            self.direction = 1
+            self._column_ids.clear()
+            self._columns.clear()
+            self._active.clear()
+            self._active_position.clear()
+            self._fire_countdown = None
+        if self.count == len(self.x):
+            self._grow()
+        index = self.count
+        self.x[index] = self.prev_x[index] = x
+        self.y[index] = self.prev_y[index] = y
+        self.alive[index] = True
+        self.sprites[index] = sprite
+        self.count += 1
+        self.living += 1
+
+        column = self._column_ids.get(x)
+        if column is None:
+            column = self._column_ids[x] = len(self._columns)
+            self._columns.append([])
+        if not self._columns[column]:
+            self._active_position[column] = len(self._active)
+            self._active.append(column)
+        insort(self._columns[column], (y, index))
+        self._column_of[index] = (column, y)
+        return index
+
+    def kill(self, index):
+        if self.alive[index]:
+            self.alive[index] = False
+            self.sprites[index] = None
+            self.living -= 1
+
+            column, y = self._column_of[index]
+            slots = self._columns[column]
+            slots.remove((y, index))
+            if not slots:
+                # Swap the emptied column out of the active list.
+                position = self._active_position.pop(column)
+                last = self._active.pop()
+                if last != column:
+                    self._active[position] = last
+                    self._active_position[last] = position
+
+    def _next_shot_delay(self):
+        chance = 1.0 - (1.0 - enemy_fire_chance) ** self.living
+        return int(self.rng.geometric(chance))
+
+    def _fire(self):
+        """Return the slot of the enemy that fires this tick, or None."""
+        if self._fire_countdown is None:
+            self._fire_countdown = self._next_shot_delay()
+        self._fire_countdown -= 1
+        if self._fire_countdown > 0:
+            return None
+        self._fire_countdown = self._next_shot_delay()
+        column = self._active[int(self.rng.integers(len(self._active)))]
+        return self._columns[column][-1][1]
+
+    def step(self):
+        """Advance the formation one tick and return the indices that fire."""
+        if self.living == 0:
+            return ()
+        count = self.count
+        alive = self.alive[:count]
+        self.prev_x[:count] = self.x[:count]
+        self.prev_y[:count] = self.y[:count]
+        xs = self.x[:count]
+        xs += enemy_speed * self.direction
+
+        live_x = xs[alive]
+        if live_x.max() >= window_width - enemy_width or live_x.min() <= 0:
+            self.y[:count] += enemy_height
+            self.direction *= -1
+
+        shooter = self._fire()
+        return () if shooter is None else (shooter,)
+
+    def rects(self):
+        """Return (slot indices, N x 4 rect array) for the living enemies."""
+        index = np.flatnonzero(self.alive[:self.count])
+        rects = np.empty((len(index), 4), dtype=np.int64)
+        rects[:, 0] = self.x[index]
+        rects[:, 1] = self.y[index]
+        rects[:, 2] = enemy_width
+        rects[:, 3] = enemy_height
+        return index, rects
+
+    def draw(self, surface, image, alpha=1.0):
+        """Blit every living enemy and return the rect around them, or None.
+
+        Enemies are drawn alpha of the way from their previous position to
+        their current one.
+        """
+        if self.living == 0:
+            return None
+        alive = self.alive[:self.count]
+        xs = self.x[:self.count][alive]
+        ys = self.y[:self.count][alive]
+        if alpha < 1.0:
+            prev_xs = self.prev_x[:self.count][alive]
+            prev_ys = self.prev_y[:self.count][alive]
+            xs = prev_xs + np.rint((xs - prev_xs) * alpha).astype(xs.dtype)
+            ys = prev_ys + np.rint((ys - prev_ys) * alpha).astype(ys.dtype)
+        surface.blits(
+            [(image, position) for position in zip(xs.tolist(), ys.tolist())], doreturn=False
+        )
+        left, top = int(xs.min()), int(ys.min())
+        bounds = pygame.Rect(
+            left, top, int(xs.max()) + enemy_width - left, int(ys.max()) + enemy_height - top
+        )
+        return bounds.clip(surface.get_rect())
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in ("x", "y", "prev_x", "prev_y", "alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self.sprites.extend([None] * (capacity - len(self.sprites)))
+        self._column_of.extend([None] * (capacity - len(self._column_of)))
@@ -2,70 +2,140 @@
 # KFarnsworth1@csu.fullerton.edu
 # @Tabushabu
 
+import io
 import os
-import warnings
+import time
 
-import pygame
-import random
-
-from pygame.mixer import Sound, get_init, pre_init
 import numpy as np
+import pygame
 
-from .rgbcolors import black, white, red, green
-from .scene import Scene
+from .rgbcolors import black, white
+from .assets import AssetManager, data_path, read_bytes
+from .bullets import ENEMY, PLAYER, BulletStore
+from .formation import Formation
+from .images import ImageRegistry
+from .pool import Pool
+from .profiler import FrameProfiler, ProfilerOverlay
+from .replay import (
+    KEY_LEFT, KEY_RIGHT, KEY_SPACE, InputRecorder, InputReplay, live_keys, state_checksum
+)
+from .scores import HighScores
+from .scene import (
+    FadeScene, GameOverScene, HighScoreScene, PauseScene, PlayScene, SceneManager, StartScene
+)
+from .sfx import SoundBank
+from .spatial import SpatialHash
+from .text import HudText, TextCache
+from .tracing import span
 from .setup import (
-    window_width, window_height, player_x, player_y, player_width, player_height, player_speed,
-    enemy_width, enemy_height, enemy_speed, bullet_width, bullet_height, bullet_speed,
-    obstacle_width, obstacle_height, obstacle_spacing
+    window_width, window_height, player_x, player_y, player_width, player_speed,
+    enemy_width, enemy_height, bullet_speed,
+    obstacle_width, obstacle_spacing, frame_rate,
+    bullet_capacity, enemy_pool_size, dirty_rect_limit,
+    player_shot_frequency, player_shot_duration, enemy_shot_frequency, enemy_shot_duration,
+    soundtrack
 )
 
 
 class Game:
-    def __init__(self):
-        self.running = True
+    def __init__(self, headless=False, seed=None, sound=None, started=None):
+        self.headless = headless
+        # Headless runs are silent unless asked otherwise; they then skip
+        # the mixer and synthesizing the sound effects altogether.
+        self.sound = not headless if sound is None else sound
+        self.init_timings = []
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "little")
+        # Every random decision in the simulation draws from this generator,
+        # so a seed plus the per-tick keys reproduce a session exactly.
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.keys = 0
+        self.recorder = None
+        self.replay = None
+        self.frame_rate = 0 if headless else frame_rate
+        self.frame_count = 0
+        self.tick_count = 0
+        self.pairs_tested = 0
+        self.prev_score = 0
         self.game_over = False
-        self.restart = False
-        self.pause = False
-        self.start_screen = True
-        self.show_high_scores = False
+        self.wave_cleared = False
+        # Opened by setup(); headless runs never record scores.
+        self.high_scores = None
+        self.new_high_score = False
+        self.final_rank = None
         self.all_sprites = None
-        self.bullets = None
+        self.bullets = BulletStore(bullet_capacity)
         self.enemies = None
-        self.enemy_bullets = None
         self.obstacles = None
+        self.enemy_pool = None
+        self.formation = Formation(rng=self.rng)
+        self.player_bullet_grid = SpatialHash()
+        self.enemy_bullet_grid = SpatialHash()
+        self._spent = None
         self.score = 0
         self.lives = 3
         self.player = None
-        self.clock = pygame.time.Clock()
+        self.scenes = None
+        self.start_scene = StartScene(self)
+        self.high_score_scene = HighScoreScene(self)
+        self.play_scene = PlayScene(self)
+        self.pause_scene = PauseScene(self)
+        self.game_over_scene = GameOverScene(self)
+        self.fade_scene = FadeScene(self)
+        # started: time.perf_counter() at launch, the zero for time to first frame.
+        self.assets = AssetManager(started)
         self._soundtrack = None
-        
-
-        self._main_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-        self._data_dir = os.path.join(self._main_dir, "videogame", "data")
-
-    def run_game(self):
-        pygame.init() 
-        pygame.mixer.init()
-
-        #pygame.time.wait(int(duration * 1000))
-        self._soundtrack = os.path.join(self._data_dir, "Tax_Evasion.mp3") 
-
-        try:
-            pygame.mixer.music.load(self._soundtrack)
-            pygame.mixer.music.set_volume(0.2)
-        except pygame.error as pygame_error:
-            print("Cannot open the mixer?")
-            raise SystemExit("broken!!") from pygame_error
-        pygame.mixer.music.play(-1)
-
-        self.window = pygame.display.set_mode((window_width, window_height))
+        self.sfx = SoundBank()
+        self.text = TextCache()
+        self.images = ImageRegistry()
+        self.score_text = HudText(self.text, "Score: {}", 25, white)
+        self.lives_text = HudText(self.text, "Lives: {}", 25, white)
+        # Phase timings are recorded in windowed play (a few clock reads a
+        # frame) so the overlay has history the moment it is shown.
+        self.profiler = FrameProfiler()
+        self.profiler.enabled = not headless
+        self.profiler_overlay = ProfilerOverlay(self.profiler, self.text)
+        self._background = None
+        self._drawn_rects = []
+        self.update_rects = None
+        self._full_redraw = True
+
+    def setup(self):
+        """Initialize pygame, open the window and build the first wave."""
+        if self.headless:
+            # No display or sound card on build boxes; SDL's dummy drivers
+            # must be selected before SDL is initialized.
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+        # Only the subsystems the game uses; pygame.init() would also start
+        # joysticks, the CD-ROM and the rest.
+        self._timed("display init", pygame.display.init)
+        self._timed("font init", pygame.font.init)
+        if self.sound:
+            self._timed("mixer init", pygame.mixer.init)
+
+        self.window = self._timed("set_mode", pygame.display.set_mode, (window_width, window_height))
         pygame.display.set_caption("Space Invaders")
+        # The first wave below needs the images straight away, and they
+        # take a fraction of a millisecond, so they are not worth a trip
+        # through the loader thread.
+        self._timed("images", self.images.load)
+        if not self.headless and self.high_scores is None:
+            self.high_scores = HighScores()
+        self.scenes = SceneManager(
+            self.window, self.frame_rate, self.assets, None if self.headless else self.fade_scene,
+            self.profiler
+        )
+        self.load_assets()
 
         self.all_sprites = pygame.sprite.Group()
-        self.bullets = pygame.sprite.Group()
+        self.bullets.clear()
+        self._background = None
         self.enemies = pygame.sprite.Group()
-        self.enemy_bullets = pygame.sprite.Group()
         self.obstacles = pygame.sprite.Group()
+        self.enemy_pool = Pool(lambda: Enemy(self), enemy_pool_size)
         self.score = 0
         self.lives = 3
         self.spawn_enemies()
@@ -74,109 +144,251 @@ class Game:
         self.player = Player(self)
         self.all_sprites.add(self.player)
 
-        while self.running:
-            if self.start_screen:
-                self.show_start_screen()
-            elif self.show_high_scores:
-                self.show_high_score_screen()
-            elif not self.game_over:
-                self.game_loop()
-            elif self.game_over:
-                self.show_game_over_screen()
+    def load_assets(self):
+        """Start loading fonts, the fade tables, sound effects and music in the background.
+
+        The title screen goes up while they load. Anything asked for before
+        it is ready waits for it; the music starts playing once it has been
+        read.
+        """
+        self.assets.add("fonts", lambda: self.text.preload((25, 36)))
+        if not self.headless:
+            self.assets.add("fade", self.fade_scene.prepare)
+        if self.sound:
+            self.assets.add("sfx", lambda: self.sfx.preload((
+                (player_shot_frequency, player_shot_duration),
+                (enemy_shot_frequency, enemy_shot_duration),
+            )))
+        if self.sound and not self.headless:
+            self.assets.add("music", lambda: read_bytes(data_path(soundtrack)), self.play_music)
+        self.assets.start()
+
+    def play_music(self, music):
+        try:
+            # Keep the file object alive; the mixer streams from it.
+            self._soundtrack = io.BytesIO(music.get())
+            pygame.mixer.music.load(self._soundtrack, "mp3")
+            pygame.mixer.music.set_volume(0.2)
+        except (OSError, pygame.error) as pygame_error:
+            print("Cannot open the mixer?")
+            raise SystemExit("broken!!") from pygame_error
+        pygame.mixer.music.play(-1)
+
+    def _timed(self, name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.init_timings.append((name, time.perf_counter() - start))
+        return result
 
+    def show_title(self):
+        """Put the title screen up and log how long the game took to get there."""
+        self.scenes.push(self.start_scene)
+        self.scenes.step()
+        self.assets.first_frame()
+
+    def run_game(self):
+        self.setup()
+        self.show_title()
+        self.scenes.run()
+        self.quit()
+
+    def quit(self):
+        # Don't pull pygame out from under a loader that is still running.
+        self.assets.wait()
+        if self.high_scores is not None:
+            self.high_scores.close()
+        if self.recorder is not None:
+            self.recorder.close()
         pygame.quit()
 
+    def run_headless(self, frames=None):
+        """Step the play scene uncapped for frames frames or until game over.
+
+        Returns a dict with the number of frames stepped, the elapsed wall
+        time in seconds and the resulting frames per second.
+        """
+        self.headless = True
+        self.frame_rate = 0
+        self.setup()
+        self.scenes.push(self.play_scene)
+
+        start = time.perf_counter()
+        while self.scenes.running:
+            if self.game_over:
+                # A recorded session may go on past a game over; the player
+                # pressed Enter on the game over screen between two ticks.
+                if self.replay is None or self.replay.finished:
+                    break
+                self.restart_game()
+            if frames is not None and self.frame_count >= frames:
+                break
+            if self.replay is not None and self.replay.finished:
+                break
+            self.scenes.step()
+        elapsed = time.perf_counter() - start
+
+        self.quit()
+        fps = self.frame_count / elapsed if elapsed > 0 else 0.0
+        return {
+            "frames": self.frame_count,
+            "seed": self.seed,
+            "checksum": state_checksum(self),
+            "replay_divergence": None if self.replay is None else self.replay.divergence,
+            "seconds": elapsed,
+            "fps": fps,
+            "bullets": self.bullets.stats(),
+            "enemy_pool": self.enemy_pool.stats(),
+            "pairs_tested": self.pairs_tested,
+        }
+
+
+    def tick(self):
+        """Advance the simulation by one fixed timestep."""
+        self.tick_count += 1
+        self.player.prev_x = self.player.rect.x
+        profiler = self.profiler
+        profiler.mark()
+        with span("input"):
+            self.process_input()
+        profiler.lap("input")
+        with span("update"):
+            self.update()
+        profiler.lap("update")
+        self.check_collisions()
+        self.pairs_tested += self.pairs_tested_this_frame
+
+        if not self.enemies:
+            # The play scene shows the pause screen before the new wave moves.
+            self.spawn_enemies()
+            self.wave_cleared = True
+
+        self.award_lives()
+
+        if self.recorder is not None:
+            self.recorder.record(self.keys, state_checksum(self))
+        elif self.replay is not None:
+            self.replay.verify(state_checksum(self))
+
+    def record_input(self, path):
+        """Log every tick's keys and state checksum to path (written on exit)."""
+        self.recorder = InputRecorder(path, self.seed)
 
-    def show_start_screen(self):
-        self.window.fill(black)
-        font = pygame.font.Font(None, 36)
-        title_text = font.render("Space Invaders", True, white)
-        tutorial_text = font.render("Left/Right arrows to move, space to Shoot", True, white)
-        start_text = font.render("Press Enter to Start", True, white)
-        high_score_text = font.render("Press H then enter to View High Scores", True, white)
-        self.window.blit(title_text, (window_width // 2 - title_text.get_width() // 2, 200))
-        self.window.blit(start_text, (window_width // 2 - start_text.get_width() // 2, 300))
-        self.window.blit(tutorial_text, (window_width // 2 - tutorial_text.get_width() // 2, 350))
-        self.window.blit(high_score_text, (window_width // 2 - high_score_text.get_width() // 2, 400))
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    self.start_screen = False
-                elif event.key == pygame.K_h:
-                    self.show_high_scores = True
-
-    def show_high_score_screen(self):
-        self.window.fill(black)
-        font = pygame.font.Font(None, 36)
-        title_text = font.render("High Scores", True, white)
-        score1_text = font.render("1. Player1 - 1000", True, white)
-        score2_text = font.render("2. Player2 - 800", True, white)
-        score3_text = font.render("3. Player3 - 600", True, white)
-        back_text = font.render("Press B to Go Back", True, white)
-        self.window.blit(title_text, (window_width // 2 - title_text.get_width() // 2, 200))
-        self.window.blit(score1_text, (window_width // 2 - score1_text.get_width() // 2, 250))
-        self.window.blit(score2_text, (window_width // 2 - score2_text.get_width() // 2, 300))
-        self.window.blit(score3_text, (window_width // 2 - score3_text.get_width() // 2, 350))
-        self.window.blit(back_text, (window_width // 2 - back_text.get_width() // 2, 400))
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_b:
-                    self.show_high_scores = False
-
-    
-    def game_loop(self):
-        self.clock.tick(60)
-
-        keys = pygame.key.get_pressed()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-
-        if keys[pygame.K_LEFT]:
+    def replay_input(self, path):
+        """Drive the game from a recorded log instead of the keyboard."""
+        self.replay = InputReplay(path)
+        self.seed = self.replay.seed
+        self.rng = np.random.default_rng(self.seed)
+        self.formation.rng = self.rng
+
+    def update(self):
+        with span("bullets"):
+            self.bullets.step()
+        with span("enemies"):
+            for index in self.formation.step():
+                self.formation.sprites[index].shoot()
+        with span("player"):
+            self.all_sprites.update()
+
+    def process_input(self):
+        if self.replay is not None:
+            self.keys = self.replay.next_keys()
+        else:
+            self.keys = live_keys()
+
+        if self.keys & KEY_LEFT:
             self.player.move_left()
-        if keys[pygame.K_RIGHT]:
+        if self.keys & KEY_RIGHT:
             self.player.move_right()
-        if keys[pygame.K_SPACE]:
+        if self.keys & KEY_SPACE:
             self.player.shoot()
 
-        self.all_sprites.update()
-
-        # Check for collisions between player bullets and enemies
-        player_bullet_hits = pygame.sprite.groupcollide(self.bullets, self.enemies, True, True)
-        for bullet, enemies in player_bullet_hits.items():
-            self.score += len(enemies)
-
+    def check_collisions(self):
+        lap = self.profiler.lap
+        with span("broad_phase"):
+            self.build_collision_grid()
+        lap("broad_phase")
+        with span("collide_bullets_enemies"):
+            self.collide_bullets_enemies()
+        lap("collide_bullets_enemies")
+        with span("collide_player_enemy_bullets"):
+            self.collide_player_enemy_bullets()
+        lap("collide_player_enemy_bullets")
+        with span("collide_bullets_obstacles"):
+            self.collide_bullets_obstacles()
+        lap("collide_bullets_obstacles")
+        with span("collide_enemy_bullets_obstacles"):
+            self.collide_enemy_bullets_obstacles()
+        lap("collide_enemy_bullets_obstacles")
+        with span("remove_spent_bullets"):
+            self.remove_spent_bullets()
+        lap("remove_spent_bullets")
+
+    def build_collision_grid(self):
+        # Player and enemy bullets are bucketed once per frame. Bullets used
+        # up by a pass are only marked spent, so the grids stay valid for the
+        # later passes, and are removed together at the end.
+        rects = self.bullets.rects()
+        for owner, grid in ((PLAYER, self.player_bullet_grid), (ENEMY, self.enemy_bullet_grid)):
+            slots = np.flatnonzero(self.bullets.owned_by(owner))
+            grid.build(rects[slots], slots)
+        self._spent = np.zeros(self.bullets.count, dtype=bool)
+
+    @property
+    def pairs_tested_this_frame(self):
+        return self.player_bullet_grid.pairs_tested + self.enemy_bullet_grid.pairs_tested
+
+    def remove_spent_bullets(self):
+        self.bullets.remove(self._spent)
+
+    def collide_bullets_enemies(self):
+        # Check for collisions between player bullets and enemies. As with
+        # groupcollide, each bullet in firing order kills every living enemy
+        # it overlaps and is used up if it killed any, so each enemy is
+        # charged to the first bullet that reached it.
+        slots, enemy_rects = self.formation.rects()
+        enemy_hits, bullet_hits = self._bullet_hits(self.player_bullet_grid, enemy_rects)
+        if not bullet_hits.size:
+            return
+        order = np.lexsort((bullet_hits, enemy_hits))
+        bullet_hits = bullet_hits[order]
+        enemy_hits = enemy_hits[order]
+        first = np.ones(len(enemy_hits), dtype=bool)
+        first[1:] = enemy_hits[1:] != enemy_hits[:-1]
+
+        self._spent[bullet_hits[first]] = True
+        for slot in slots[enemy_hits[first]].tolist():
+            self.formation.sprites[slot].kill()
+        self.score += int(first.sum())
+
+    def collide_player_enemy_bullets(self):
         # Check for collisions between player and enemy bullets
-        enemy_bullet_hits = pygame.sprite.spritecollide(self.player, self.enemy_bullets, True)
-        if enemy_bullet_hits:
+        _, enemy_bullet_hits = self._bullet_hits(self.enemy_bullet_grid, np.array([tuple(self.player.rect)]))
+        if enemy_bullet_hits.size:
+            self._spent[enemy_bullet_hits] = True
             self.lives -= 1
             if self.lives == 0:
                 self.game_over = True
 
+    def collide_bullets_obstacles(self):
         # Check for collisions between player bullets and obstacles
-        player_bullet_obstacle_hits = pygame.sprite.groupcollide(self.bullets, self.obstacles, True, False)
+        _, bullet_hits = self._bullet_hits(self.player_bullet_grid, self._obstacle_rects())
+        self._spent[bullet_hits] = True
 
+    def collide_enemy_bullets_obstacles(self):
         # Check for collisions between enemy bullets and obstacles
-        enemy_bullet_obstacle_hits = pygame.sprite.groupcollide(self.enemy_bullets, self.obstacles, True, False)
+        _, bullet_hits = self._bullet_hits(self.enemy_bullet_grid, self._obstacle_rects())
+        self._spent[bullet_hits] = True
 
-        if not self.enemies:
-            self.pause = True  
-            self.show_pause_screen()  # Show the pause screen when there are no more enemies
-            self.spawn_enemies()  # Respawn enemies after the pause
+    def _obstacle_rects(self):
+        return np.array([tuple(obstacle.rect) for obstacle in self.obstacles]).reshape(-1, 4)
 
-        self.window.fill(black)
-        self.all_sprites.draw(self.window)
-        self.draw_text(f"Score: {self.score}", 25, white, 50, 10)
+    def _bullet_hits(self, grid, target_rects):
+        """Return (target index, bullet slot) pairs for the grid's unspent bullets."""
+        target_hits, bullet_hits = grid.query(target_rects)
+        live = ~self._spent[bullet_hits]
+        return target_hits[live], bullet_hits[live]
 
+    def award_lives(self):
         # Gain 1 life every 16 points
         if self.score >= 16 and self.score % 16 == 0 and self.score != self.prev_score:
             self.lives += 1
@@ -184,88 +396,104 @@ class Game:
         elif self.score % 16 != 0:
             self.prev_score = 0
 
-        self.draw_text(f"Lives: {self.lives}", 25, white, window_width - 50, 10)
-        pygame.display.flip()
-
-        if self.game_over:
-            self.show_game_over_screen()
-
-        # Pause and restart the game
-        if self.game_over or self.start_screen or self.show_high_scores:
-            return
-
-        # Restart the game after the pause
-        if self.pause:
-            self.pause = False
-            self.game_loop()
-
-
-    def show_pause_screen(self):
-        self.window.fill(black)
-        font = pygame.font.Font(None, 36)
-        pause_text = font.render("Congratulations, You Beat The Wave!", True, white)
-        resume_text = font.render("Press any key to start the next Wave", True, white)
-        self.window.blit(pause_text, (window_width // 2 - pause_text.get_width() // 2, 200))
-        self.window.blit(resume_text, (window_width // 2 - resume_text.get_width() // 2, 300))
-        pygame.display.flip()
-
-        pygame.event.clear()  # Clear previous events
-
-        while True:
-            event = pygame.event.wait()
-            if event.type == pygame.QUIT:
-                self.running = False
-                break
-            elif event.type == pygame.KEYDOWN:
-                break
-
+    def draw_frame(self, alpha=1.0):
+        """Draw the playfield, remembering which parts of the window changed.
+
+        The black background and the obstacles never move, so they are
+        rendered once into self._background. Each frame only the rects
+        drawn on the previous frame are restored from it before the moving
+        things are drawn again; the scene manager then pushes just those
+        rects to the display, or flips the whole window when there are too
+        many.
+
+        alpha is how far (0 to 1) the frame falls between the previous tick
+        and the current one; moving things are drawn that far along.
+        """
+        window = self.window
+        if self._background is None:
+            self._background = self.build_background()
+            self._full_redraw = True
+
+        erase = self._drawn_rects
+        if self._full_redraw or len(erase) + self.bullets.count > dirty_rect_limit:
+            window.blit(self._background, (0, 0))
+            self._full_redraw = True
+        else:
+            window.blits([(self._background, rect, rect) for rect in erase], doreturn=False)
+
+        drawn = []
+        enemy_bounds = self.formation.draw(window, self.images.get("enemy"), alpha)
+        if enemy_bounds is not None:
+            drawn.append(enemy_bounds)
+        drawn.append(window.blit(self.player.image, self.player.interpolated_rect(alpha)))
+        # Past the limit the next frame is a full redraw anyway, so skip
+        # building a Rect per bullet.
+        track_bullets = self.bullets.count <= dirty_rect_limit
+        drawn.extend(self.bullets.draw(window, self.images.get("bullet"), track_bullets, alpha))
+        drawn.append(self.blit_midtop(self.score_text.render(self.score), 50, 10))
+        drawn.append(self.blit_midtop(self.lives_text.render(self.lives), window_width - 50, 10))
+        if self.profiler_overlay.visible:
+            drawn.append(self.profiler_overlay.draw(window, self.entity_counts()))
+
+        self.update_rects = None if self._full_redraw else erase + drawn
+        self._drawn_rects = drawn
+        self._full_redraw = not track_bullets
+
+    def entity_counts(self):
+        player_bullets = int(np.count_nonzero(self.bullets.owned_by(PLAYER)))
+        return {
+            "bullets": player_bullets,
+            "enemies": len(self.enemies),
+            "enemy_bullets": self.bullets.count - player_bullets,
+        }
+
+    def invalidate(self):
+        """Make the next frame redraw the whole window."""
+        self._full_redraw = True
+
+    def build_background(self):
+        background = pygame.Surface(self.window.get_size()).convert()
+        background.fill(black)
+        self.obstacles.draw(background)
+        return background
 
 
     def draw_text(self, text, size, color, x, y):
-        font = pygame.font.Font(None, size)
-        text_surface = font.render(text, True, color)
+        self.blit_midtop(self.text.render(text, size, color), x, y)
+
+    def blit_midtop(self, text_surface, x, y):
         text_rect = text_surface.get_rect()
         text_rect.midtop = (x, y)
-        self.window.blit(text_surface, text_rect)
+        return self.window.blit(text_surface, text_rect)
 
     def spawn_enemies(self):
-        for row in range(4):
-            for column in range(4):
-                enemy = Enemy(self, column * (enemy_width + 10) + 50, row * (enemy_height + 10) + 50)
-                self.all_sprites.add(enemy)
-                self.enemies.add(enemy)
+        with span("spawn_enemies"):
+            for row in range(4):
+                for column in range(4):
+                    enemy = self.enemy_pool.acquire(column * (enemy_width + 10) + 50, row * (enemy_height + 10) + 50)
+                    self.enemies.add(enemy)
 
     def spawn_obstacles(self):
         for column in range(4):
-            obstacle = Obstacle(column * (obstacle_width + obstacle_spacing) + 200, window_height - 150)
+            obstacle = Obstacle(self, column * (obstacle_width + obstacle_spacing) + 200, window_height - 150)
             self.all_sprites.add(obstacle)
             self.obstacles.add(obstacle)
 
-    def show_game_over_screen(self):
-        self.window.fill(black)
-        font = pygame.font.Font(None, 36)
-        game_over_text = font.render("Game Over", True, white)
-        restart_text = font.render("Press Enter to Restart", True, white)
-        self.window.blit(game_over_text, (window_width // 2 - game_over_text.get_width() // 2, 200))
-        self.window.blit(restart_text, (window_width // 2 - restart_text.get_width() // 2, 300))
-        pygame.display.flip()
-
-        while self.game_over:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    self.game_over = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN:
-                        self.restart_game()
+    def end_game(self):
+        """Record the run on the leaderboard; it is committed in the background."""
+        self.final_rank = self.high_scores.rank(self.score)
+        self.new_high_score = self.high_scores.add(self.score)
 
     def restart_game(self):
         self.game_over = False
-        self.all_sprites.empty()
-        self.bullets.empty()
-        self.enemies.empty()
-        self.enemy_bullets.empty()
-        self.obstacles.empty()
+        # The last enemy can die on the tick the last life is lost.
+        self.wave_cleared = False
+        self.new_high_score = False
+        # kill() rather than empty() so pooled sprites go back to their pools.
+        for sprite in self.all_sprites.sprites() + self.enemies.sprites():
+            sprite.kill()
+        self.bullets.clear()
+        self._background = None
         self.score = 0
         self.lives = 3
         self.spawn_enemies()
@@ -278,17 +506,21 @@ class Player(pygame.sprite.Sprite):
     def __init__(self, game):
         super().__init__()
         self.game = game
-        self.image = pygame.Surface((player_width, player_height))
-        self.image.fill(white)
+        self.image = game.images.get("player")
         self.rect = self.image.get_rect()
         self.rect.x = player_x
         self.rect.y = player_y
+        self.prev_x = self.rect.x
+
+    def interpolated_rect(self, alpha):
+        rect = self.rect.copy()
+        rect.x = round(self.prev_x + (self.rect.x - self.prev_x) * alpha)
+        return rect
 
     def update(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
+        if self.game.keys & KEY_LEFT:
             self.move_left()
-        if keys[pygame.K_RIGHT]:
+        if self.game.keys & KEY_RIGHT:
             self.move_right()
 
     def move_left(self):
@@ -302,93 +534,55 @@ class Player(pygame.sprite.Sprite):
             self.rect.x = window_width - player_width
 
     def shoot(self):
-        sample_rate = 44100
-        duration = 0.01
-        frequency = 440
-
-        t = np.linspace(0, duration, int(sample_rate * duration))
-        audio_data = np.zeros((len(t), 2), dtype=np.int16)
-        audio_data[:, 0] = (np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
-        audio_data[:, 1] = audio_data[:, 0]
+        with span("sfx"):
+            self.game.sfx.play(player_shot_frequency, player_shot_duration)
+        self.game.bullets.spawn(self.rect.centerx, self.rect.top, -bullet_speed, PLAYER)
 
 
-        sound = pygame.sndarray.make_sound(audio_data)
-        sound.play()
-        bullet = Bullet(self.rect.centerx, self.rect.top, "up")
-        self.game.all_sprites.add(bullet)
-        self.game.bullets.add(bullet)
+class Enemy(pygame.sprite.Sprite):
+    """A view onto one slot of the game's Formation.
 
+    Enemies are not in all_sprites: the formation moves them all at once
+    and Game.update() asks it which ones fire, so there is no per-enemy
+    update() call. Its position lives in the formation's arrays; the
+    sprite itself only holds the slot index. (pygame.sprite.Sprite has no
+    __slots__, so subclasses always carry a __dict__ and declaring slots
+    here would save nothing.)
+    """
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, game, x, y):
+    def __init__(self, game):
         super().__init__()
         self.game = game
-        self.radius = enemy_width // 2
-        self.image = pygame.Surface((enemy_width, enemy_height))
-        #self.image.fill((red))
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.x_direction = 1
+        self.image = game.images.get("enemy")
+        self.index = None
 
-        pygame.draw.circle(self.image, (red), (self.radius, self.radius), self.radius)
-
-    def update(self):
-        self.rect.x += enemy_speed * self.x_direction
-        if self.rect.x >= window_width - enemy_width or self.rect.x <= 0:
-            self.y_move()
-            self.x_direction *= -1
+    def reset(self, x, y):
+        self.index = self.game.formation.add(x, y, self)
 
-        if random.randint(0, 100) < 1:
-            self.shoot()
+    @property
+    def rect(self):
+        formation = self.game.formation
+        return pygame.Rect(
+            int(formation.x[self.index]), int(formation.y[self.index]), enemy_width, enemy_height
+        )
 
-    def y_move(self):
-        self.rect.y += enemy_height
+    def kill(self):
+        if self.alive():
+            super().kill()
+            self.game.formation.kill(self.index)
+            self.game.enemy_pool.release(self)
 
     def shoot(self):
-
-        sample_rate = 44100
-        duration = 0.05
-        frequency = 200
-
-        t = np.linspace(0, duration, int(sample_rate * duration))
-        audio_data = np.zeros((len(t), 2), dtype=np.int16)
-        audio_data[:, 0] = (np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
-        audio_data[:, 1] = audio_data[:, 0]
-
-        sound = pygame.sndarray.make_sound(audio_data)
-        sound.play()
-
-        bullet = Bullet(self.rect.centerx, self.rect.bottom, "down")
-        self.game.all_sprites.add(bullet)
-        self.game.enemy_bullets.add(bullet)
-
-
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x, y, direction):
-        super().__init__()
-        self.image = pygame.Surface((bullet_width, bullet_height))
-        self.image.fill(white)
-        self.rect = self.image.get_rect()
-        self.rect.x = x - bullet_width // 2
-        self.rect.y = y
-        self.direction = direction
-
-    def update(self):
-        if self.direction == "up":
-            self.rect.y -= bullet_speed
-        elif self.direction == "down":
-            self.rect.y += bullet_speed
-
-        if self.rect.bottom < 0 or self.rect.top > window_height:
-            self.kill()
+        with span("sfx"):
+            self.game.sfx.play(enemy_shot_frequency, enemy_shot_duration)
+        rect = self.rect
+        self.game.bullets.spawn(rect.centerx, rect.bottom, bullet_speed, ENEMY)
 
 
 class Obstacle(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, game, x, y):
         super().__init__()
-        self.image = pygame.Surface((obstacle_width, obstacle_height))
-        self.image.fill(green)
+        self.image = game.images.get("obstacle")
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
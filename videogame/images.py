@@ -0,0 +1,61 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Sprite images built once per game and shared by every sprite of a type."""
+
+import pygame
+
+from .rgbcolors import black, green, red, white
+from .setup import (
+    bullet_height, bullet_width, enemy_height, enemy_width, obstacle_height, obstacle_width,
+    player_height, player_width
+)
+
+
+class ImageRegistry:
+    """One surface per sprite type, converted to the display's pixel format.
+
+    Unconverted surfaces go through a pixel format conversion on every
+    blit, so load() must run after pygame.display.set_mode(). Every sprite
+    of a type shares the same surface; nothing may draw onto them.
+    """
+
+    def __init__(self):
+        self._images = {}
+
+    def load(self):
+        if self._images:
+            return
+        self._images = {
+            "player": self._solid((player_width, player_height), white),
+            "bullet": self._solid((bullet_width, bullet_height), white),
+            "obstacle": self._solid((obstacle_width, obstacle_height), green),
+            "enemy": self._enemy(),
+        }
+
+    def get(self, name):
+        if not self._images:
+            self.load()
+        return self._images[name]
+
+    @staticmethod
+    def _convert(surface):
+        if pygame.display.get_surface() is None:
+            return surface
+        return surface.convert()
+
+    def _solid(self, size, color):
+        surface = pygame.Surface(size)
+        surface.fill(color)
+        return self._convert(surface)
+
+    def _enemy(self):
+        radius = enemy_width // 2
+        surface = pygame.Surface((enemy_width, enemy_height))
+        surface.fill(black)
+        pygame.draw.circle(surface, red, (radius, radius), radius)
+        surface = self._convert(surface)
+        # Only the circle is drawn; RLE makes skipping the corners cheap.
+        surface.set_colorkey(black, pygame.RLEACCEL)
+        return surface
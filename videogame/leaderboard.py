@@ -0,0 +1,160 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Every recorded run in an SQLite database, indexed by score."""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from .setup import leaderboard_timeout
+
+leaderboard_path = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "leaderboard.db"
+)
+
+# Bumped whenever _schema changes; opening an older database reruns it.
+_schema_version = 1
+
+# Statements run in order, in one transaction. score_counts is derived from
+# runs, so it is simply rebuilt; at_or_above is the number of runs scoring
+# at least score. The old per-row trigger is replaced by add_many().
+_schema = (
+    """CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        score INTEGER NOT NULL,
+        name TEXT NOT NULL DEFAULT '',
+        recorded REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC, id)",
+    "DROP TRIGGER IF EXISTS count_run",
+    "DROP TABLE IF EXISTS score_counts",
+    """CREATE TABLE score_counts (
+        score INTEGER PRIMARY KEY,
+        runs INTEGER NOT NULL,
+        at_or_above INTEGER NOT NULL
+    )""",
+    """INSERT INTO score_counts (score, runs, at_or_above)
+    SELECT score, COUNT(*), SUM(COUNT(*)) OVER (ORDER BY score DESC)
+    FROM runs GROUP BY score""",
+    f"PRAGMA user_version = {_schema_version}",
+)
+
+# Folding a batch of new runs (those with id > :first) into score_counts:
+# the batch is summarized in temp.batch the same way (read by id range;
+# left to itself the planner skip-scans runs_by_score once per distinct
+# score), rows are added for scores seen for the first time (starting
+# from the runs above them), and every row at or below the batch's best
+# score gains the batch runs at or above it.
+_count_batch = (
+    "DELETE FROM temp.batch",
+    """INSERT INTO temp.batch (score, runs, at_or_above)
+    SELECT score, COUNT(*), SUM(COUNT(*)) OVER (ORDER BY score DESC)
+    FROM runs NOT INDEXED WHERE id > :first GROUP BY score""",
+    """INSERT INTO score_counts (score, runs, at_or_above)
+    SELECT b.score, 0, COALESCE(
+        (SELECT c.at_or_above FROM score_counts c WHERE c.score > b.score ORDER BY c.score LIMIT 1), 0
+    )
+    FROM temp.batch b WHERE b.score NOT IN (SELECT score FROM score_counts)""",
+    """UPDATE score_counts SET
+        runs = runs + COALESCE((SELECT b.runs FROM temp.batch b WHERE b.score = score_counts.score), 0),
+        at_or_above = at_or_above + (
+            SELECT b.at_or_above FROM temp.batch b
+            WHERE b.score >= score_counts.score ORDER BY b.score LIMIT 1
+        )
+    WHERE score <= (SELECT MAX(score) FROM temp.batch)""",
+)
+
+
+class Leaderboard:
+    """Runs ordered by score (highest first, earliest first among ties).
+
+    runs_by_score makes a page of the table O(log n + page), and pages are
+    fetched by key, not OFFSET, so page 10000 costs the same as page 1.
+    score_counts keeps one row per distinct score with the number of runs
+    at or above it, so rank() and count() are a single O(log n) lookup;
+    rank() runs on the main thread at game over. The price is paid by
+    add_many(), which also updates the row of every distinct score at or
+    below the batch's best: O(k log n + d log k) for k runs over d
+    distinct scores, once per batch rather than per run. Writes happen on
+    the HighScores writer thread.
+
+    The database is in WAL mode, so several game processes on one machine
+    can write while others read; a writer waits up to timeout seconds for
+    another's transaction. Connections belong to the thread that opened
+    them.
+    """
+
+    def __init__(self, path=leaderboard_path, timeout=leaderboard_timeout):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._version() != _schema_version:
+            with self._transaction():
+                # Another process may have upgraded it while we waited.
+                if self._version() != _schema_version:
+                    for statement in _schema:
+                        self._db.execute(statement)
+        self._db.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS batch "
+            "(score INTEGER PRIMARY KEY, runs INTEGER NOT NULL, at_or_above INTEGER NOT NULL)"
+        )
+
+    def add(self, score, name=""):
+        self.add_many(((score, name, time.time()),))
+
+    def add_many(self, runs):
+        """Insert (score, name, recorded) rows in one transaction."""
+        with self._transaction():
+            first = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM runs").fetchone()[0]
+            self._db.executemany("INSERT INTO runs (score, name, recorded) VALUES (?, ?, ?)", runs)
+            for statement in _count_batch:
+                self._db.execute(statement, {"first": first})
+
+    def count(self):
+        query = "SELECT at_or_above FROM score_counts ORDER BY score LIMIT 1"
+        row = self._db.execute(query).fetchone()
+        return 0 if row is None else row[0]
+
+    def rank(self, score):
+        """Return the place score takes: 1 + the number of runs that beat it."""
+        query = "SELECT at_or_above FROM score_counts WHERE score > ? ORDER BY score LIMIT 1"
+        row = self._db.execute(query, (score,)).fetchone()
+        return 1 if row is None else 1 + row[0]
+
+    def page(self, size, after=None):
+        """Return up to size (id, score, name) rows following the row after.
+
+        after is the last row of the previous page, or None for the top.
+        """
+        if after is None:
+            query = "SELECT id, score, name FROM runs ORDER BY score DESC, id LIMIT ?"
+            return self._db.execute(query, (size,)).fetchall()
+        last_id, last_score = after[0], after[1]
+        query = "SELECT id, score, name FROM runs WHERE score = ? AND id > ? ORDER BY id LIMIT ?"
+        rows = self._db.execute(query, (last_score, last_id, size)).fetchall()
+        if len(rows) < size:
+            query = "SELECT id, score, name FROM runs WHERE score < ? ORDER BY score DESC, id LIMIT ?"
+            rows += self._db.execute(query, (last_score, size - len(rows))).fetchall()
+        return rows
+
+    def close(self):
+        self._db.close()
+
+    def _version(self):
+        return self._db.execute("PRAGMA user_version").fetchone()[0]
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so a busy database makes
+        # us wait for the timeout at BEGIN instead of failing at COMMIT.
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
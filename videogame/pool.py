@@ -0,0 +1,48 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Free lists for sprites that are created and destroyed many times a second."""
+
+
+class Pool:
+    """A pre-sized free list of objects built by factory.
+
+    acquire() hands out a recycled object when one is free (a hit) and
+    otherwise doubles the pool (a miss, counted once in growth). Objects are
+    re-initialized with reset(*args) on the way out and must be given back
+    with release() when they die.
+    """
+
+    def __init__(self, factory, size=0):
+        self._factory = factory
+        self._free = [factory() for _ in range(size)]
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.growth = 0
+
+    def acquire(self, *args):
+        if self._free:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.growth += 1
+            extra = max(1, self.size)
+            self._free.extend(self._factory() for _ in range(extra))
+            self.size += extra
+        obj = self._free.pop()
+        obj.reset(*args)
+        return obj
+
+    def release(self, obj):
+        self._free.append(obj)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "free": len(self._free),
+            "hits": self.hits,
+            "misses": self.misses,
+            "growth": self.growth,
+        }
@@ -0,0 +1,171 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Per-phase frame timings in a ring buffer and an overlay that shows them."""
+
+import time
+from array import array
+
+import numpy as np
+import pygame
+
+from .rgbcolors import black, gray40, green, red, white, yellow
+from .setup import frame_rate, profiler_history, profiler_refresh
+
+PHASES = (
+    "input",
+    "update",
+    "broad_phase",
+    "collide_bullets_enemies",
+    "collide_player_enemy_bullets",
+    "collide_bullets_obstacles",
+    "collide_enemy_bullets_obstacles",
+    "remove_spent_bullets",
+    "draw",
+    "present",
+)
+
+
+class FrameProfiler:
+    """Seconds spent in each phase for the last history frames.
+
+    lap(phase) charges the time since the previous lap (or mark()) to
+    phase in the current frame's row, so a frame that runs several ticks
+    adds them up. Rows are slices of one preallocated array and frame
+    times go in a second one: a lap is a clock read and an array store,
+    and with enabled False every call returns at once.
+    """
+
+    def __init__(self, phases=PHASES, history=profiler_history):
+        self.phases = phases
+        self.history = history
+        self.enabled = False
+        self.frames = 0
+        self._column = {phase: i for i, phase in enumerate(phases)}
+        self._laps = array("d", bytes(8 * history * len(phases)))
+        self._frame_times = array("d", bytes(8 * history))
+        self._blank_row = array("d", bytes(8 * len(phases)))
+        self._row = 0
+        self._frame_start = None
+        self._last = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._frame_times[self.frames % self.history] = now - self._frame_start
+            self.frames += 1
+        self._frame_start = now
+        self._last = now
+        width = len(self.phases)
+        self._row = (self.frames % self.history) * width
+        self._laps[self._row:self._row + width] = self._blank_row
+
+    def mark(self):
+        """Start the next lap now, leaving the time since the last one uncharged."""
+        if self._last is not None:
+            self._last = time.perf_counter()
+
+    def lap(self, phase):
+        if self._last is None:
+            return
+        now = time.perf_counter()
+        self._laps[self._row + self._column[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        self._last = None
+
+    def pause(self):
+        """Forget the frame in progress, e.g. while a menu is up."""
+        self._frame_start = None
+        self._last = None
+
+    def summary(self):
+        """Return frame times (oldest first) and per-phase laps, both in ms.
+
+        Only finished frames are included; the arrays are (n,) and
+        (n, len(phases)).
+        """
+        count = min(self.frames, self.history)
+        rows = (np.arange(self.frames - count, self.frames) % self.history)
+        frame_times = np.frombuffer(self._frame_times)[rows] * 1000
+        laps = np.frombuffer(self._laps).reshape(self.history, len(self.phases))[rows] * 1000
+        return frame_times, laps
+
+
+class ProfilerOverlay:
+    """A panel with percentiles, per-phase times, entity counts and a frame-time graph.
+
+    The panel is rendered into its own surface every refresh frames and
+    blitted in between, so showing it costs one blit most frames.
+    """
+
+    width = 320
+    line_height = 16
+    graph_height = 60
+    graph_ceiling = 50.0
+
+    def __init__(self, profiler, text, refresh=profiler_refresh):
+        self.profiler = profiler
+        self.text = text
+        self.refresh = refresh
+        self.visible = False
+        self._panel = None
+        self._rendered_at = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._rendered_at = None
+
+    def draw(self, surface, counts):
+        frames = self.profiler.frames
+        if self._rendered_at is None or frames - self._rendered_at >= self.refresh:
+            self._render(counts)
+            self._rendered_at = frames
+        return surface.blit(self._panel, (surface.get_width() - self.width - 10, 40))
+
+    def _render(self, counts):
+        frame_times, laps = self.profiler.summary()
+        # Each line is (text, mean, max); the numbers go in their own columns.
+        lines = []
+        if frame_times.size:
+            p50, p95, p99 = np.percentile(frame_times, (50, 95, 99))
+            lines.append((f"frame ms  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}", None, None))
+            lines.append(("phase ms", "mean", "max"))
+            for phase, mean, peak in zip(self.profiler.phases, laps.mean(axis=0), laps.max(axis=0)):
+                lines.append((phase, f"{mean:.2f}", f"{peak:.2f}"))
+        else:
+            lines.append(("collecting frames...", None, None))
+        lines.append(("  ".join(f"{name} {count}" for name, count in counts.items()), None, None))
+
+        height = len(lines) * self.line_height + self.graph_height + 12
+        if self._panel is None or self._panel.get_height() != height:
+            self._panel = pygame.Surface((self.width, height)).convert()
+        panel = self._panel
+        panel.fill(black)
+        pygame.draw.rect(panel, gray40, panel.get_rect(), 1)
+        # The numbers change every render, so bypass the text LRU.
+        font = self.text.font(16)
+        for i, (label, mean, peak) in enumerate(lines):
+            y = 4 + i * self.line_height
+            color = yellow if i == len(lines) - 1 else white
+            panel.blit(font.render(label, False, color), (4, y))
+            for column, value in ((self.width - 80, mean), (self.width - 40, peak)):
+                if value is not None:
+                    panel.blit(font.render(value, False, color), (column, y))
+
+        top = len(lines) * self.line_height + 6
+        bottom = top + self.graph_height
+        budget = bottom - self.graph_height * (1000.0 / frame_rate) / self.graph_ceiling
+        pygame.draw.line(panel, green, (4, budget), (self.width - 5, budget))
+        if frame_times.size > 1:
+            scale = self.graph_height / self.graph_ceiling
+            step = (self.width - 8) / (self.profiler.history - 1)
+            points = [
+                (4 + i * step, bottom - min(ms, self.graph_ceiling) * scale)
+                for i, ms in enumerate(frame_times.tolist())
+            ]
+            pygame.draw.lines(panel, red, False, points)
@@ -0,0 +1,104 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Per-tick input logs and state checksums for repeatable runs.
+
+A log starts with a fixed header (magic, version, RNG seed, tick count)
+followed by one 5-byte record per simulation tick: the held keys as a
+bit mask and a CRC-32 of the game state at the end of that tick.
+"""
+
+import struct
+import zlib
+
+import pygame
+
+KEY_LEFT = 1
+KEY_RIGHT = 2
+KEY_SPACE = 4
+
+_MAGIC = b"SIIL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHQI")
+_RECORD = struct.Struct("<BI")
+
+
+def live_keys():
+    """Return the keys held right now as a KEY_* bit mask."""
+    pressed = pygame.key.get_pressed()
+    keys = 0
+    if pressed[pygame.K_LEFT]:
+        keys |= KEY_LEFT
+    if pressed[pygame.K_RIGHT]:
+        keys |= KEY_RIGHT
+    if pressed[pygame.K_SPACE]:
+        keys |= KEY_SPACE
+    return keys
+
+
+def state_checksum(game):
+    """CRC-32 over everything a tick can change."""
+    formation = game.formation
+    bullets = game.bullets
+    crc = zlib.crc32(struct.pack(
+        "<QqqqqQ", game.tick_count, game.score, game.lives, game.player.rect.x,
+        formation.direction, formation.count,
+    ))
+    for array in (formation.x, formation.y, formation.alive):
+        crc = zlib.crc32(array[:formation.count].tobytes(), crc)
+    for array in (bullets.x, bullets.y, bullets.vy, bullets.owner):
+        crc = zlib.crc32(array[:bullets.count].tobytes(), crc)
+    return crc
+
+
+class InputRecorder:
+    """Writes the keys and end-of-tick checksum of every tick to a log."""
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self._records = bytearray()
+        self.ticks = 0
+
+    def record(self, keys, checksum):
+        self._records += _RECORD.pack(keys, checksum)
+        self.ticks += 1
+
+    def close(self):
+        with open(self.path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, self.seed, self.ticks))
+            file.write(self._records)
+
+
+class InputReplay:
+    """Feeds a recorded log back one tick at a time and checks the state."""
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is not a version {_VERSION} input log")
+        magic, version, self.seed, self.ticks = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} input log")
+        self._records = memoryview(data)[_HEADER.size:]
+        if len(self._records) < self.ticks * _RECORD.size:
+            raise ValueError(f"{path} is truncated")
+        self.position = 0
+        self.divergence = None
+
+    @property
+    def finished(self):
+        return self.position >= self.ticks
+
+    def next_keys(self):
+        keys, _ = _RECORD.unpack_from(self._records, self.position * _RECORD.size)
+        return keys
+
+    def verify(self, checksum):
+        """Check the state after the current tick, then move to the next one."""
+        _, expected = _RECORD.unpack_from(self._records, self.position * _RECORD.size)
+        if checksum != expected and self.divergence is None:
+            self.divergence = self.position
+        self.position += 1
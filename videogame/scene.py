@@ -2,72 +2,487 @@
 # KFarnsworth1@csu.fullerton.edu
 # @Tabushabu
 
+"""Scenes and the stack that runs them.
+
+A Scene is one screen of the game: the menus, the playfield, the pause
+and game over screens. The SceneManager keeps them on a stack, sends the
+top one its events and calls its update(dt) and draw(surface) from a
+single loop that owns the clock. Scenes are built once by the Game and
+reused, and they all draw into the same window surface, so changing
+screens allocates nothing.
+"""
+
+import numpy as np
 import pygame
 
+from .rgbcolors import Fade, black, white
+from .tracing import span
+from .setup import (
+    window_width, idle_timeout, update_rate, max_frame_time, fade_duration, fade_steps,
+    high_score_page_size
+)
+
+
+class Scene:
+    """Base class for a screen; every hook does nothing by default."""
+
+    def __init__(self, game):
+        self.game = game
+
+    @property
+    def idle(self):
+        """True when the scene has nothing to do until the next event.
+
+        The manager then sleeps on the event queue instead of spinning.
+        """
+        return False
+
+    def enter(self):
+        """Called each time the scene becomes the top of the stack."""
+
+    def handle(self, event):
+        """React to one event from the queue."""
+
+    def update(self, dt):
+        """Advance by dt seconds of wall time."""
+
+    def draw(self, surface):
+        """Draw into surface and return the rects that changed.
+
+        None means the whole surface changed; an empty list means nothing
+        did and the display is left alone.
+        """
+        return []
+
+
+class SceneManager:
+    """A stack of scenes driven by one loop and one clock."""
+
+    def __init__(self, surface, frame_rate=0, assets=None, transition=None, profiler=None):
+        self.surface = surface
+        self.frame_rate = frame_rate
+        self.assets = assets
+        self.transition = transition
+        self.profiler = profiler
+        self.clock = pygame.time.Clock()
+        self.running = True
+        self._stack = []
+
+    @property
+    def top(self):
+        return self._stack[-1] if self._stack else None
+
+    def push(self, scene):
+        self._stack.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self._stack.pop()
+        if self._stack:
+            self._stack[-1].enter()
+        return scene
+
+    def replace(self, scene):
+        self._stack.pop()
+        self.push(scene)
+
+    def fade(self, change, *args):
+        """Call change(*args) (push, pop, replace...) behind a fade through black.
+
+        Without a transition scene the change happens at once.
+        """
+        if self.transition is None or not self.transition.supports(self.surface):
+            change(*args)
+            return
+        self.transition.begin(change, args)
+        self.resume_transition()
+
+    def suspend_transition(self):
+        """Take the transition off the stack so the change it hides can run."""
+        self._stack.remove(self.transition)
+
+    def resume_transition(self):
+        """Put the transition (back) on top of the stack, without enter()."""
+        self._stack.append(self.transition)
+
+    def run(self):
+        while self.running and self._stack:
+            self.step()
+
+    def step(self):
+        """Run one frame: events, update and draw for the top scene."""
+        with span("frame"):
+            self._step()
+
+    def _step(self):
+        if self.assets is not None:
+            self.assets.poll()
+        with span("events"):
+            for event in self.events():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                    return
+                self.top.handle(event)
+                if not self._stack:
+                    return
+
+        dt = self.clock.tick(self.frame_rate) / 1000.0
+        scene = self.top
+        with span("scene.update"):
+            scene.update(dt)
+        with span("scene.draw"):
+            rects = scene.draw(self.surface)
+        with span("present"):
+            self.present(rects)
+        if self.profiler is not None:
+            self.profiler.lap("present")
+            self.profiler.end_frame()
+
+    @staticmethod
+    def present(rects):
+        """Push rects to the display: None flips it all, [] leaves it alone."""
+        if rects is None:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+
+    def events(self):
+        if not self.top.idle:
+            return pygame.event.get()
+        # Nothing will change until something happens; sleep until an
+        # event arrives or idle_timeout passes.
+        event = pygame.event.wait(idle_timeout)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        events.extend(pygame.event.get())
+        return events
+
+
+class FadeScene(Scene):
+    """Fades the window out, makes a scene change, then fades the new scene in.
+
+    It sits on top of the stack for the length of the fade and swallows
+    input. The window is snapshotted once per direction and each frame is
+    the snapshot run through a Fade table. Black rows stay black at every
+    level, so only the bands of rows with something in them are faded and
+    pushed to the display.
+    """
+
+    def __init__(self, game, duration=fade_duration, steps=fade_steps):
+        super().__init__(game)
+        self.duration = duration
+        self.steps = steps
+        self._fade = None
+        self._snapshot = None
+        self._bands = []
+        self._band_rects = []
+        self._change = None
+        self._elapsed = None
+        self._fading_in = False
+        self._snapshot_taken = False
+
+    def prepare(self):
+        """Build the fade tables ahead of the first fade."""
+        if self._fade is None:
+            self._fade = Fade(self.steps)
+
+    def supports(self, surface):
+        return Fade.supports(surface)
+
+    def begin(self, change, args):
+        self._change = (change, args)
+        self._fading_in = False
+        self._snapshot_taken = False
+        self._elapsed = None
+
+    def update(self, dt):
+        if not self._fading_in and not self._snapshot_taken:
+            # The scene below drew its last frame after asking for the fade.
+            self._take_snapshot()
+        # However long the frame before the fade took, it starts now.
+        self._elapsed = 0.0 if self._elapsed is None else self._elapsed + dt
+        if self._elapsed < self.duration:
+            return
+        if self._fading_in:
+            self.game.scenes.pop()
+        else:
+            self._swap()
+
+    def draw(self, surface):
+        if self.game.scenes.top is not self:
+            return []
+        level = min((self._elapsed or 0.0) / self.duration, 1.0)
+        if not self._fading_in:
+            level = 1.0 - level
+        self._fade.apply(surface, level, self._snapshot, self._bands)
+        return self._band_rects
+
+    def _swap(self):
+        scenes = self.game.scenes
+        scenes.suspend_transition()
+        change, args = self._change
+        self._change = None
+        change(*args)
+        scenes.top.draw(scenes.surface)
+        self._take_snapshot()
+        self._fading_in = True
+        self._elapsed = None
+        scenes.resume_transition()
+
+    def _take_snapshot(self):
+        surface = self.game.scenes.surface
+        self.prepare()
+        if self._snapshot is None:
+            self._snapshot = surface.copy()
+        else:
+            self._snapshot.blit(surface, (0, 0))
+        self._snapshot_taken = True
+
+        pixels = np.frombuffer(self._snapshot.get_buffer(), dtype=np.uint8)
+        lit = pixels.reshape(surface.get_height(), -1).any(axis=1)
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], lit, [False])).astype(np.int8)))
+        self._bands = []
+        for first, stop in edges.reshape(-1, 2).tolist():
+            # Join bands a few rows apart; one call costs more than the rows.
+            if self._bands and first - self._bands[-1][1] < 8:
+                first = self._bands.pop()[0]
+            self._bands.append((first, stop))
+        width = surface.get_width()
+        self._band_rects = [pygame.Rect(0, first, width, stop - first) for first, stop in self._bands]
+
+
+class MenuScene(Scene):
+    """A static screen of centred lines, drawn once each time it is shown."""
+
+    lines = ()
+
+    def __init__(self, game):
+        super().__init__(game)
+        self._shown = False
+
+    @property
+    def idle(self):
+        return self._shown
+
+    def enter(self):
+        self._shown = False
+
+    def handle(self, event):
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            # The compositor lost our pixels; draw the screen again.
+            self._shown = False
+
+    def text_lines(self):
+        return self.lines
+
+    def draw(self, surface):
+        if self._shown:
+            return []
+        surface.fill(black)
+        for text, y in self.text_lines():
+            text_surface = self.game.text.render(text, 36, white)
+            surface.blit(text_surface, (window_width // 2 - text_surface.get_width() // 2, y))
+        self._shown = True
+        return None
+
+
+class StartScene(MenuScene):
+    lines = (
+        ("Space Invaders", 200),
+        ("Press Enter to Start", 300),
+        ("Left/Right arrows to move, space to Shoot", 350),
+        ("Press H then enter to View High Scores", 400),
+    )
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.high_scores_requested = False
+
+    @property
+    def idle(self):
+        # Keep the loop turning while assets load so the music starts
+        # as soon as it is ready.
+        return super().idle and not self.game.assets.pending
+
+    def enter(self):
+        super().enter()
+        self.high_scores_requested = False
+
+    def handle(self, event):
+        super().handle(event)
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_h:
+            self.high_scores_requested = True
+        elif event.key == pygame.K_RETURN:
+            scenes = self.game.scenes
+            if self.high_scores_requested:
+                scenes.fade(scenes.push, self.game.high_score_scene)
+            else:
+                scenes.fade(scenes.replace, self.game.play_scene)
+
+
+class HighScoreScene(MenuScene):
+    """Pages through the leaderboard, page_size runs at a time.
+
+    Pages already fetched are kept until the screen is next opened, so
+    paging back costs no queries, and the rendered lines come from the
+    game's TextCache.
+    """
+
+    page_size = high_score_page_size
+
+    def __init__(self, game):
+        super().__init__(game)
+        self._pages = []
+        self._page = 0
+
+    def enter(self):
+        super().enter()
+        self._pages = [self.game.high_scores.leaderboard.page(self.page_size)]
+        self._page = 0
+
+    def text_lines(self):
+        lines = [("High Scores", 150)]
+        first = self._page * self.page_size
+        for place, (_, score, name) in enumerate(self._pages[self._page], first + 1):
+            lines.append((f"{place}. {score} {name}".rstrip(), 210 + 45 * (place - first - 1)))
+        if not self._pages[0]:
+            lines.append(("No scores yet", 210))
+        lines.append(("Left/Right to Page, B to Go Back", 460))
+        return lines
+
+    def handle(self, event):
+        super().handle(event)
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_b:
+            self.game.scenes.fade(self.game.scenes.pop)
+        elif event.key == pygame.K_RIGHT:
+            self.turn_page(1)
+        elif event.key == pygame.K_LEFT:
+            self.turn_page(-1)
+
+    def turn_page(self, step):
+        page = self._page + step
+        if page < 0:
+            return
+        if page == len(self._pages):
+            last_page = self._pages[-1]
+            rows = self.game.high_scores.leaderboard.page(self.page_size, last_page[-1]) if last_page else []
+            if not rows:
+                return
+            self._pages.append(rows)
+        self._page = page
+        self._shown = False
+
+
+class PauseScene(MenuScene):
+    lines = (
+        ("Congratulations, You Beat The Wave!", 200),
+        ("Press any key to start the next Wave", 300),
+    )
 
-class Scene(pygame.sprite.Sprite):
-    def __init__(self):
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface((800, 600))
-        self.image.fill((255, 255, 255))
-        self.rect = self.image.get_rect()
-        self.rect.x = 0
-        self.rect.y = 0
+    def enter(self):
+        super().enter()
+        # Keys held down while the wave was being cleared must not skip
+        # straight past the screen.
+        pygame.event.clear(pygame.KEYDOWN)
 
+    def handle(self, event):
+        super().handle(event)
+        if event.type == pygame.KEYDOWN:
+            self.game.scenes.fade(self.game.scenes.pop)
 
-class StartScene(Scene):
-    def __init__(self):
-        super().__init__()
-        self.font = pygame.font.Font(None, 36)
-        self.title = self.font.render("Space Invaders", True, (0, 0, 0))
-        self.title_rect = self.title.get_rect(center=(400, 250))
 
-    def draw(self, window):
-        window.blit(self.title, self.title_rect)
+class GameOverScene(MenuScene):
+    def text_lines(self):
+        lines = [
+            ("Game Over", 200),
+            (f"Score: {self.game.score} - Rank {self.game.final_rank}", 250),
+            ("Press Enter to Restart", 300),
+        ]
+        if self.game.new_high_score:
+            lines.append(("New High Score!", 350))
+        return lines
 
+    def handle(self, event):
+        super().handle(event)
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+            self.game.scenes.fade(self.restart)
 
-class GameOverScene(Scene):
-    def __init__(self, score, is_high_score):
-        super().__init__()
-        self.font = pygame.font.Font(None, 36)
-        self.game_over_text = self.font.render("Game Over", True, (0, 0, 0))
-        self.game_over_rect = self.game_over_text.get_rect(center=(400, 250))
-        self.score_text = self.font.render(f"Score: {score}", True, (0, 0, 0))
-        self.score_rect = self.score_text.get_rect(center=(400, 300))
+    def restart(self):
+        self.game.restart_game()
+        self.game.scenes.pop()
 
-        if is_high_score:
-            self.high_score_text = self.font.render("New High Score!", True, (0, 0, 0))
-            self.high_score_rect = self.high_score_text.get_rect(center=(400, 350))
 
-    def draw(self, window):
-        window.blit(self.game_over_text, self.game_over_rect)
-        window.blit(self.score_text, self.score_rect)
+class PlayScene(Scene):
+    """The playfield, simulated on a fixed timestep.
 
-        if hasattr(self, 'high_score_text'):
-            window.blit(self.high_score_text, self.high_score_rect)
+    The simulation always advances in steps of 1 / update_rate seconds,
+    however long the frame took, and frames draw the world interpolated
+    between the last two ticks. A slow frame is caught up with extra
+    ticks (at most max_frame_time worth) instead of slowing the game.
+    Headless runs take exactly one tick per frame. F3 shows or hides the
+    frame profiler overlay.
+    """
 
+    def __init__(self, game):
+        super().__init__(game)
+        self.timestep = 1.0 / update_rate
+        self._accumulator = 0.0
+        self._alpha = 1.0
+        self._clock_stale = True
 
-def run_game():
-    pygame.init()
-    window = pygame.display.set_mode((800, 600))
-    pygame.display.set_caption("Space Invaders")
+    def enter(self):
+        # Time spent on a menu or the pause screen is not game time, and
+        # whatever that screen drew has to be painted over.
+        self._clock_stale = True
+        self.game.invalidate()
+        self.game.profiler.pause()
 
-    scenes = {
-        'start': StartScene(),
-        'game': GameScene(),
-        'game_over': GameOverScene(),
-    }
+    def handle(self, event):
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            self.game.invalidate()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.game.profiler_overlay.toggle()
 
-    current_scene = scenes['start']
+    def update(self, dt):
+        game = self.game
+        game.frame_count += 1
+        game.profiler.begin_frame()
 
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        if game.headless:
+            ticks = 1
+            alpha = 1.0
+        else:
+            if self._clock_stale:
+                dt = 0.0
+                self._accumulator = self.timestep
+                self._clock_stale = False
+            self._accumulator += min(dt, max_frame_time)
+            ticks = int(self._accumulator // self.timestep)
+            self._accumulator -= ticks * self.timestep
+            alpha = self._accumulator / self.timestep
 
-        current_scene.draw(window)
+        for _ in range(ticks):
+            with span("tick"):
+                game.tick()
+            if game.game_over or game.wave_cleared:
+                alpha = 1.0
+                break
+        self._alpha = alpha
 
-        pygame.display.flip()
+        if game.headless:
+            game.wave_cleared = False
+        elif game.game_over:
+            game.end_game()
+            game.scenes.fade(game.scenes.push, game.game_over_scene)
+        elif game.wave_cleared:
+            game.wave_cleared = False
+            game.scenes.fade(game.scenes.push, game.pause_scene)
 
-    pygame.quit()
+    def draw(self, surface):
+        self.game.profiler.mark()
+        self.game.draw_frame(self._alpha)
+        self.game.profiler.lap("draw")
+        return self.game.update_rects
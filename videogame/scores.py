@@ -0,0 +1,136 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""The high score table, saved without blocking the game."""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .leaderboard import Leaderboard, leaderboard_path
+from .setup import high_score_count
+
+log = logging.getLogger(__name__)
+
+high_scores_path = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "high_scores.json"
+)
+
+
+class HighScores:
+    """The best size scores, highest first, over a Leaderboard of every run.
+
+    The table is read from the leaderboard once and kept in memory. add()
+    updates it and queues the run for a writer thread with its own
+    connection, so a game over never waits on the disk; SQLite commits
+    are atomic, so a crash mid-save loses at most the runs not yet
+    committed. A corrupt database is moved aside to <path>.corrupt and a
+    new one is started. One that cannot be opened for any other reason
+    (locked, read-only, out of space) is left alone and the session's
+    runs are kept in memory only; path is then None. Scores from the old
+    high_scores.json are imported into a new database.
+    """
+
+    def __init__(self, path=leaderboard_path, size=high_score_count, legacy_path=high_scores_path):
+        self.path = path
+        self.size = size
+        self.leaderboard = self._open()
+        if self.leaderboard.count() == 0:
+            self._import_legacy(legacy_path)
+        self.scores = [score for _, score, _ in self.leaderboard.page(size)]
+        self._queue = None
+        self._writer = None
+
+    def is_high_score(self, score):
+        return score > 0 and (len(self.scores) < self.size or score > self.scores[-1])
+
+    def rank(self, score):
+        return self.leaderboard.rank(score)
+
+    def add(self, score, name=""):
+        """Record a finished run; return True if it made the table."""
+        high_score = self.is_high_score(score)
+        if high_score:
+            self.scores.append(score)
+            self.scores.sort(reverse=True)
+            del self.scores[self.size:]
+        if self.path is None:
+            self.leaderboard.add(score, name)
+            return high_score
+        if self._writer is None:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, name="high-scores", daemon=True)
+            self._writer.start()
+        self._queue.put((score, name, time.time()))
+        return high_score
+
+    def close(self):
+        """Wait for queued runs to be committed."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self.leaderboard.close()
+
+    def _open(self):
+        leaderboard = None
+        try:
+            leaderboard = Leaderboard(self.path)
+            leaderboard.count()
+            return leaderboard
+        except sqlite3.OperationalError as error:
+            # The file may be fine; whatever is wrong is not our data.
+            log.warning("cannot open leaderboard %s (%s); scores will not be saved", self.path, error)
+            if leaderboard is not None:
+                leaderboard.close()
+            self.path = None
+            return Leaderboard(":memory:")
+        except sqlite3.DatabaseError as error:
+            # Anything else from SQLite here (not a database, malformed
+            # image) means the file itself is damaged.
+            log.warning("corrupt leaderboard %s (%s); starting a new one", self.path, error)
+            if leaderboard is not None:
+                leaderboard.close()
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.replace(self.path + suffix, self.path + suffix + ".corrupt")
+                except OSError:
+                    pass
+            return Leaderboard(self.path)
+
+    def _import_legacy(self, legacy_path):
+        try:
+            with open(legacy_path) as scores_file:
+                scores = json.load(scores_file)
+        except (OSError, ValueError):
+            return
+        if isinstance(scores, list):
+            recorded = time.time()
+            self.leaderboard.add_many(
+                (score, "", recorded) for score in scores if type(score) is int
+            )
+
+    def _write_loop(self):
+        leaderboard = Leaderboard(self.path)
+        try:
+            while True:
+                runs = [self._queue.get()]
+                # Commit everything that is waiting in one transaction.
+                while not self._queue.empty():
+                    runs.append(self._queue.get())
+                done = runs[-1] is None
+                runs = [run for run in runs if run is not None]
+                if runs:
+                    try:
+                        leaderboard.add_many(runs)
+                    except sqlite3.Error as error:
+                        log.warning("could not save %d runs to %s: %s", len(runs), self.path, error)
+                if done:
+                    return
+        finally:
+            leaderboard.close()
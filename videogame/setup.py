@@ -2,12 +2,13 @@
 # KFarnsworth1@csu.fullerton.edu
 # @Tabushabu
 
-import pygame
-import json
-
 
 window_width = 800
 window_height = 600
+frame_rate = 60
+update_rate = 60
+max_frame_time = 0.25
+idle_timeout = 500
 player_width = 50
 player_height = 50
 player_x = window_width // 2 - player_width // 2
@@ -18,16 +19,32 @@ player_speed = 5
 enemy_width = 50
 enemy_height = 50
 enemy_speed = 2
+enemy_fire_chance = 1 / 101
 bullet_width = 5
 bullet_height = 20
 bullet_speed = 7
 obstacle_width = 100
 obstacle_height = 20
 obstacle_spacing = 100
-
-high_scores = []
-try:
-    with open("high_scores.json") as file:
-        high_scores = json.load(file)
-except FileNotFoundError:
-    pass
+soundtrack = "Tax_Evasion.mp3"
+sound_sample_rate = 44100
+sfx_channels = 8
+text_cache_size = 64
+bullet_capacity = 256
+enemy_pool_size = 16
+collision_cell_size = 64
+collision_brute_force_pairs = 4096
+aabb_broadcast_pairs = 65536
+dirty_rect_limit = 200
+fade_duration = 0.25
+fade_steps = 16
+player_shot_frequency = 440
+player_shot_duration = 0.01
+enemy_shot_frequency = 200
+enemy_shot_duration = 0.05
+high_score_count = 10
+high_score_page_size = 5
+leaderboard_timeout = 5.0
+profiler_history = 240
+profiler_refresh = 15
+trace_buffer_size = 4096
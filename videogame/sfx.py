@@ -0,0 +1,97 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Synthesized sound effects, built once and played on a fixed channel pool."""
+
+import threading
+
+import numpy as np
+import pygame
+from pygame.mixer import get_init
+
+from .setup import sound_sample_rate, sfx_channels
+
+
+def synthesize_tone(frequency, duration, sample_rate=sound_sample_rate):
+    """Return a pygame Sound holding a sine tone shaped for the current mixer."""
+    t = np.linspace(0, duration, int(sample_rate * duration))
+    wave = (np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
+    mixer_channels = get_init()[2]
+    if mixer_channels == 1:
+        audio_data = wave
+    else:
+        audio_data = np.repeat(wave[:, np.newaxis], mixer_channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(audio_data))
+
+
+class SoundBank:
+    """Cache of synthesized effects plus a bounded pool of mixer channels.
+
+    Each (frequency, duration, sample_rate) tone is synthesized the first
+    time it is asked for and the same Sound is returned afterwards. play()
+    reuses one of a fixed number of reserved channels; when they are all busy
+    the channel that was started longest ago is cut off and reused.
+    """
+
+    def __init__(self, channels=sfx_channels):
+        self._sounds = {}
+        self._lock = threading.Lock()
+        self._num_channels = channels
+        self._channels = None
+        self._next = 0
+        self.plays = 0
+        self.steals = 0
+
+    def get(self, frequency, duration, sample_rate=sound_sample_rate):
+        key = (frequency, duration, sample_rate)
+        sound = self._sounds.get(key)
+        if sound is None:
+            # Tones may be synthesizing on the asset loader thread.
+            with self._lock:
+                sound = self._sounds.get(key)
+                if sound is None:
+                    sound = synthesize_tone(frequency, duration, sample_rate)
+                    self._sounds[key] = sound
+        return sound
+
+    def preload(self, tones):
+        """Synthesize each (frequency, duration) tone ahead of its first play()."""
+        for frequency, duration in tones:
+            self.get(frequency, duration)
+
+    def play(self, frequency, duration, sample_rate=sound_sample_rate):
+        """Play a tone on the channel pool; a no-op if the mixer is not running."""
+        if not get_init():
+            return None
+        sound = self.get(frequency, duration, sample_rate)
+        channel = self._channel()
+        channel.play(sound)
+        self.plays += 1
+        return channel
+
+    def clear(self):
+        """Forget cached sounds and channels, e.g. after the mixer is re-initialized."""
+        self._sounds.clear()
+        self._channels = None
+        self._next = 0
+
+    def _channel(self):
+        if self._channels is None:
+            if pygame.mixer.get_num_channels() < self._num_channels:
+                pygame.mixer.set_num_channels(self._num_channels)
+            # Keep automatic Sound.play() calls off the effect voices.
+            pygame.mixer.set_reserved(self._num_channels)
+            self._channels = [pygame.mixer.Channel(i) for i in range(self._num_channels)]
+
+        for _ in range(self._num_channels):
+            channel = self._channels[self._next]
+            self._next = (self._next + 1) % self._num_channels
+            if not channel.get_busy():
+                return channel
+
+        # Every voice is busy: _next now points at the oldest one started.
+        self.steals += 1
+        channel = self._channels[self._next]
+        self._next = (self._next + 1) % self._num_channels
+        return channel
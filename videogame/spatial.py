@@ -0,0 +1,100 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Uniform-grid spatial hash used as the collision broad phase."""
+
+import numpy as np
+
+from .aabb import collide_rects, overlap
+from .setup import collision_brute_force_pairs, collision_cell_size
+
+# Cell keys are cy * _STRIDE + cx, unique for any |cx| < _STRIDE // 2.
+_STRIDE = 1 << 20
+
+
+def _cells(rects, cell_size):
+    """Expand N x 4 (x, y, w, h) rects into (rect index, cell key) pairs."""
+    x = rects[:, 0]
+    y = rects[:, 1]
+    cx0 = x // cell_size
+    cy0 = y // cell_size
+    nx = (x + rects[:, 2] - 1) // cell_size - cx0 + 1
+    ny = (y + rects[:, 3] - 1) // cell_size - cy0 + 1
+    counts = nx * ny
+    entry = np.repeat(np.arange(len(rects)), counts)
+    offset = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    width = nx[entry]
+    keys = (cy0[entry] + offset // width) * _STRIDE + cx0[entry] + offset % width
+    return entry, keys
+
+
+class SpatialHash:
+    """Moving rects bucketed by grid cell, rebuilt once per frame.
+
+    build() buckets one kind of bullet. query() buckets a handful of target
+    rects (enemies, obstacles, the player) the same way and pairs each
+    target only with the items that share one of its cells. A pair that
+    shares several cells is kept only in the cell that holds the top-left
+    corner of the overlap, so no pair is tested twice. pairs_tested counts
+    the candidate pairs since the last build.
+
+    When targets x items is at most brute_force_pairs (the player against
+    a few hundred bullets) bucketing costs more than it saves, and every
+    pair is tested directly instead.
+    """
+
+    def __init__(self, cell_size=collision_cell_size, brute_force_pairs=collision_brute_force_pairs):
+        self.cell_size = cell_size
+        self.brute_force_pairs = brute_force_pairs
+        self._rects = np.zeros((0, 4), dtype=np.int64)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._keys = None
+        self._entry = None
+        self.pairs_tested = 0
+
+    def build(self, rects, ids):
+        """Bucket an N x 4 rect array; query() reports items by their ids."""
+        self._rects = rects
+        self._ids = ids
+        self._keys = None
+        self.pairs_tested = 0
+
+    def _bucket(self):
+        # Deferred until the first query that is too big to brute force.
+        entry, keys = _cells(self._rects, self.cell_size)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._entry = entry[order]
+
+    def query(self, rects):
+        """Return (target index, item id) arrays for every overlapping pair."""
+        empty = np.zeros(0, dtype=np.int64)
+        if not len(rects) or not len(self._rects):
+            return empty, empty
+
+        if len(rects) * len(self._rects) <= self.brute_force_pairs:
+            self.pairs_tested += len(rects) * len(self._rects)
+            target_index, item_index = collide_rects(rects, self._rects)
+            return target_index, self._ids[item_index]
+
+        if self._keys is None:
+            self._bucket()
+        entry, keys = _cells(rects, self.cell_size)
+        lo = np.searchsorted(self._keys, keys, side="left")
+        counts = np.searchsorted(self._keys, keys, side="right") - lo
+        total = int(counts.sum())
+        if not total:
+            return empty, empty
+        position = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        target_index = np.repeat(entry, counts)
+        item_index = self._entry[position]
+        self.pairs_tested += total
+
+        targets = rects[target_index]
+        items = self._rects[item_index]
+        corner_x = np.maximum(targets[:, 0], items[:, 0]) // self.cell_size
+        corner_y = np.maximum(targets[:, 1], items[:, 1]) // self.cell_size
+        owned = corner_y * _STRIDE + corner_x == np.repeat(keys, counts)
+        hit = owned & overlap(targets, items)
+        return target_index[hit], self._ids[item_index[hit]]
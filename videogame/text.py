@@ -0,0 +1,85 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Cached fonts and rendered text surfaces."""
+
+import threading
+from collections import OrderedDict
+
+import pygame
+
+from .setup import text_cache_size
+
+
+class TextCache:
+    """Fonts keyed by size and an LRU of rendered text surfaces.
+
+    Loading a font and rasterizing glyphs are both expensive, so fonts are
+    opened once per size and each (text, size, color, antialias) surface is
+    kept until it falls off the end of the LRU.
+    """
+
+    def __init__(self, max_surfaces=text_cache_size):
+        self.max_surfaces = max_surfaces
+        self._fonts = {}
+        self._font_lock = threading.Lock()
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            # Fonts may be opening on the asset loader thread.
+            with self._font_lock:
+                font = self._fonts.get(size)
+                if font is None:
+                    font = pygame.font.Font(None, size)
+                    self._fonts[size] = font
+        return font
+
+    def preload(self, sizes):
+        for size in sizes:
+            self.font(size)
+
+    def render(self, text, size, color, antialias=True):
+        key = (text, size, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font(size).render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drop every font and surface, e.g. after pygame.quit()."""
+        self._fonts.clear()
+        self._surfaces.clear()
+
+
+class HudText:
+    """A HUD label such as "Score: {}" that re-renders only when its value changes."""
+
+    def __init__(self, cache, template, size, color):
+        self.cache = cache
+        self.template = template
+        self.size = size
+        self.color = color
+        self._value = None
+        self._surface = None
+
+    def render(self, value):
+        if self._surface is None or value != self._value:
+            self._value = value
+            # Bypass the LRU: a changing score would only churn it.
+            self._surface = self.cache.font(self.size).render(
+                self.template.format(value), True, self.color
+            )
+        return self._surface
@@ -0,0 +1,134 @@
+# Kyler Farnsworth
+# KFarnsworth1@csu.fullerton.edu
+# @Tabushabu
+
+"""Spans written as Chrome trace events for chrome://tracing or Perfetto.
+
+    tracing.start("session.json")
+    with tracing.span("draw"):
+        ...
+    tracing.stop()
+
+Until start() is called span() hands back one shared do-nothing context
+manager, so instrumented code costs a function call and a with block.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+from .setup import trace_buffer_size
+
+_off = nullcontext()
+_tracer = None
+
+
+class Tracer:
+    """Buffers finished spans and writes them to path on a background thread.
+
+    The main thread only appends (name, start, end, thread) tuples; every
+    buffer_size spans the batch is handed to the writer, which formats it
+    as trace-event JSON. Timestamps are microseconds since the tracer
+    started.
+    """
+
+    def __init__(self, path, buffer_size=trace_buffer_size):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._origin = time.perf_counter()
+        self._events = []
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, name, start, end):
+        self._events.append((name, start, end, threading.get_ident()))
+        if len(self._events) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._events:
+            self._queue.put(self._events)
+            self._events = []
+
+    def close(self):
+        """Write out what is buffered and finish the file."""
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+    def _write_loop(self):
+        pid = os.getpid()
+        names = {}
+        threads = {}
+        with open(self.path, "w") as trace_file:
+            trace_file.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+            separator = ""
+            while True:
+                events = self._queue.get()
+                if events is None:
+                    break
+                lines = []
+                for name, start, end, thread in events:
+                    if thread not in threads:
+                        threads[thread] = len(threads) + 1
+                        label = "main" if thread == threading.main_thread().ident else str(thread)
+                        lines.append(json.dumps({
+                            "name": "thread_name", "ph": "M", "pid": pid, "tid": threads[thread],
+                            "args": {"name": label},
+                        }))
+                    quoted = names.get(name)
+                    if quoted is None:
+                        quoted = names[name] = json.dumps(name)
+                    lines.append(
+                        f'{{"name": {quoted}, "ph": "X", "pid": {pid}, "tid": {threads[thread]}, '
+                        f'"ts": {(start - self._origin) * 1e6:.3f}, "dur": {(end - start) * 1e6:.3f}}}'
+                    )
+                trace_file.write(separator + ",\n".join(lines))
+                separator = ",\n"
+            trace_file.write("\n]}\n")
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, time.perf_counter())
+
+
+def span(name):
+    """Return a context manager that records name as a span while tracing."""
+    tracer = _tracer
+    if tracer is None:
+        return _off
+    return _Span(tracer, name)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def start(path, buffer_size=trace_buffer_size):
+    """Start recording spans to path, replacing any trace in progress."""
+    global _tracer
+    stop()
+    _tracer = Tracer(path, buffer_size)
+
+
+def stop():
+    """Stop recording and finish the trace file; does nothing if not tracing."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()